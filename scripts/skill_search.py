@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Full-text BM25 search over skill reference documents.
+
+Usage:
+    python skill_search.py search "crsp delisting returns"
+    python skill_search.py search "short form citation" -k 10 --json
+    python skill_search.py index            # refresh changed files only
+    python skill_search.py index --rebuild  # re-index everything
+    python skill_search.py stats
+
+Indexes Markdown under:
+    - skills/*/references/
+    - lib/skills/*/references/
+    - lib/references/
+
+Each Markdown section (heading to next heading) is one BM25 document, so
+results point at file:line anchors instead of whole files. The inverted
+index lives on disk and is refreshed incrementally: files are re-tokenized
+only when their size or mtime changes, and `search` refreshes before every
+query (a stat() per file, no reads for unchanged files).
+
+Index location: $WORKFLOWS_CACHE_DIR/skill-search/index.json
+(default ~/.cache/workflows/skill-search/index.json)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_GLOBS = (
+    "skills/*/references/**/*.md",
+    "lib/skills/*/references/**/*.md",
+    "lib/references/*.md",
+)
+
+INDEX_VERSION = 1
+
+# BM25 parameters (standard Robertson/Sparck Jones defaults)
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_\-]*[a-z0-9]|[a-z0-9]")
+HEADING_RE = re.compile(r"^#{1,6}\s")
+
+STOPWORDS = frozenset(
+    """a an and are as at be but by for from has have if in into is it its
+    not of on or that the their then there these this to was were will with
+    you your""".split()
+)
+
+
+def cache_dir() -> Path:
+    """Return the workflows cache root, honoring WORKFLOWS_CACHE_DIR."""
+    override = os.environ.get("WORKFLOWS_CACHE_DIR")
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "workflows"
+
+
+def default_index_path() -> Path:
+    return cache_dir() / "skill-search" / "index.json"
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-word characters, drop stopwords."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def split_sections(lines: list[str]) -> list[tuple[int, int]]:
+    """Split a Markdown file into (start, end) line spans at headings.
+
+    Line numbers are 1-based and end-exclusive. Headings inside fenced
+    code blocks do not start a new section.
+    """
+    starts = [1]
+    in_fence = False
+    for i, line in enumerate(lines, 1):
+        stripped = line.lstrip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+            continue
+        if not in_fence and i > 1 and HEADING_RE.match(line):
+            starts.append(i)
+    ends = starts[1:] + [len(lines) + 1]
+    return [(s, e) for s, e in zip(starts, ends) if e > s]
+
+
+def discover_files(root: Path, globs: tuple[str, ...] = DEFAULT_GLOBS) -> list[Path]:
+    """Return all Markdown files matched by the index globs."""
+    found = set()
+    for pattern in globs:
+        found.update(p for p in root.glob(pattern) if p.is_file())
+    return sorted(found)
+
+
+class SkillIndex:
+    """On-disk inverted index with BM25 scoring over Markdown sections."""
+
+    def __init__(self, root: Path, path: Path):
+        self.root = root
+        self.path = path
+        # files: relpath -> {"sig": [size, mtime_ns], "sections": [section ids]}
+        self.files: dict[str, dict] = {}
+        # sections: id -> [relpath, start, end, length]
+        self.sections: dict[str, list] = {}
+        # postings: term -> {section id: term frequency}
+        self.postings: dict[str, dict[str, int]] = {}
+        self.total_length = 0
+        self._dirty = False
+
+    # -- persistence -------------------------------------------------------
+
+    @classmethod
+    def load(cls, root: Path, path: Path) -> "SkillIndex":
+        index = cls(root, path)
+        if not path.exists():
+            return index
+        try:
+            data = json.loads(path.read_text())
+        except (json.JSONDecodeError, OSError):
+            return index
+        if data.get("version") != INDEX_VERSION or data.get("root") != str(root):
+            return index
+        index.files = data["files"]
+        index.sections = data["sections"]
+        index.postings = data["postings"]
+        index.total_length = data["total_length"]
+        return index
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "files": self.files,
+            "sections": self.sections,
+            "postings": self.postings,
+            "total_length": self.total_length,
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")))
+        tmp.replace(self.path)
+        self._dirty = False
+
+    # -- maintenance -------------------------------------------------------
+
+    def _remove_file(self, rel: str) -> None:
+        entry = self.files.pop(rel, None)
+        if entry is None:
+            return
+        doomed = set(entry["sections"])
+        for sid in doomed:
+            self.total_length -= self.sections.pop(sid)[3]
+        for term in entry["terms"]:
+            plist = self.postings.get(term)
+            if plist is None:
+                continue
+            for sid in doomed & plist.keys():
+                del plist[sid]
+            if not plist:
+                del self.postings[term]
+        self._dirty = True
+
+    def _add_file(self, path: Path, rel: str, sig: list[int]) -> None:
+        lines = path.read_text(errors="replace").splitlines()
+        section_ids = []
+        file_terms = set()
+        for start, end in split_sections(lines):
+            tokens = tokenize("\n".join(lines[start - 1:end - 1]))
+            if not tokens:
+                continue
+            sid = f"{rel}:{start}"
+            section_ids.append(sid)
+            self.sections[sid] = [rel, start, end, len(tokens)]
+            self.total_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, {})[sid] = tf
+                file_terms.add(term)
+        self.files[rel] = {
+            "sig": sig,
+            "sections": section_ids,
+            "terms": sorted(file_terms),
+        }
+        self._dirty = True
+
+    def refresh(self, rebuild: bool = False) -> dict[str, int]:
+        """Re-index files whose size or mtime changed; drop deleted files.
+
+        Returns counts of added, updated, removed and unchanged files.
+        """
+        if rebuild:
+            self.files, self.sections, self.postings = {}, {}, {}
+            self.total_length = 0
+            self._dirty = True
+
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for path in discover_files(self.root):
+            rel = path.relative_to(self.root).as_posix()
+            seen.add(rel)
+            st = path.stat()
+            sig = [st.st_size, st.st_mtime_ns]
+            existing = self.files.get(rel)
+            if existing is not None and existing["sig"] == sig:
+                stats["unchanged"] += 1
+                continue
+            if existing is not None:
+                self._remove_file(rel)
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            self._add_file(path, rel, sig)
+
+        for rel in set(self.files) - seen:
+            self._remove_file(rel)
+            stats["removed"] += 1
+        return stats
+
+    # -- querying ----------------------------------------------------------
+
+    def search(self, query: str, k: int = 5) -> list[dict]:
+        """Return the top-k sections for query, ranked by BM25."""
+        terms = tokenize(query)
+        n_docs = len(self.sections)
+        if not terms or not n_docs:
+            return []
+        avg_len = self.total_length / n_docs
+
+        scores: dict[str, float] = {}
+        for term in set(terms):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            df = len(plist)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for sid, tf in plist.items():
+                length = self.sections[sid][3]
+                denom = tf + K1 * (1 - B + B * length / avg_len)
+                scores[sid] = scores.get(sid, 0.0) + idf * tf * (K1 + 1) / denom
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [self._hit(sid, score, set(terms)) for sid, score in ranked]
+
+    def _hit(self, sid: str, score: float, terms: set[str]) -> dict:
+        rel, start, end, _ = self.sections[sid]
+        try:
+            lines = (self.root / rel).read_text(errors="replace").splitlines()
+        except OSError:
+            lines = []
+        section = lines[start - 1:end - 1]
+
+        # Anchor on the line with the most distinct query terms
+        best_line, best_hits = start, -1
+        for offset, line in enumerate(section):
+            hits = len(terms.intersection(tokenize(line)))
+            if hits > best_hits:
+                best_line, best_hits = start + offset, hits
+
+        heading = section[0].strip() if section else ""
+        snippet = lines[best_line - 1].strip() if lines else ""
+        return {
+            "file": rel,
+            "line": best_line,
+            "section_line": start,
+            "heading": heading,
+            "score": round(score, 4),
+            "snippet": snippet,
+        }
+
+
+def print_results(results: list[dict], as_json: bool = False) -> None:
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+    if not results:
+        print("No matches.")
+        return
+    for r in results:
+        print(f"{r['file']}:{r['line']}  ({r['score']:.2f})")
+        if r["heading"] and r["line"] != r["section_line"]:
+            print(f"    {r['heading'][:100]}")
+        snippet = r["snippet"]
+        print(f"    {snippet[:160]}{'...' if len(snippet) > 160 else ''}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="BM25 full-text search over skill reference documents."
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=PLUGIN_ROOT,
+        help="Plugin root to index (default: this repository)",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=None,
+        help=f"Index file (default: {default_index_path()})",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_search = sub.add_parser("search", help="Query the index")
+    p_search.add_argument("query", nargs="+", help="Search terms")
+    p_search.add_argument("-k", type=int, default=5, help="Number of results (default: 5)")
+    p_search.add_argument("--json", action="store_true", help="Output results as JSON")
+    p_search.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="Skip the incremental refresh before querying",
+    )
+
+    p_index = sub.add_parser("index", help="Refresh the index")
+    p_index.add_argument("--rebuild", action="store_true", help="Re-index every file")
+
+    sub.add_parser("stats", help="Show index statistics")
+
+    args = parser.parse_args()
+    root = args.root.resolve()
+    index_path = args.index or default_index_path()
+
+    t0 = time.perf_counter()
+    index = SkillIndex.load(root, index_path)
+
+    if args.command == "index":
+        stats = index.refresh(rebuild=args.rebuild)
+        index.save()
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(
+            f"Indexed {len(index.files)} files, {len(index.sections)} sections "
+            f"({stats['added']} added, {stats['updated']} updated, "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged) "
+            f"in {elapsed:.0f} ms"
+        )
+        return
+
+    if args.command == "stats":
+        print(f"Index:    {index_path}")
+        print(f"Root:     {root}")
+        print(f"Files:    {len(index.files)}")
+        print(f"Sections: {len(index.sections)}")
+        print(f"Terms:    {len(index.postings)}")
+        return
+
+    if not args.no_refresh:
+        index.refresh()
+        index.save()
+    results = index.search(" ".join(args.query), k=args.k)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print_results(results, as_json=args.json)
+    if not args.json:
+        print(f"{len(results)} result(s) in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
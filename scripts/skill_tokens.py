@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Measure the context-token footprint of skills and commands.
+
+Usage:
+    python skill_tokens.py report                 # current footprint table
+    python skill_tokens.py report --json
+    python skill_tokens.py baseline               # write scripts/token-baseline.json
+    python skill_tokens.py check                  # diff against baseline, exit 1 on regression
+    python skill_tokens.py check --threshold 5 --min-delta 100
+
+Measures:
+    - skills/*/SKILL.md, lib/skills/*/SKILL.md, plugins/*/skills/*/SKILL.md
+    - everything under each skill's references/ directory
+    - commands/*.md and plugins/*/commands/*.md
+
+"load" is what entering a skill or command costs (SKILL.md or command file).
+"refs" is the on-demand reference set; it is reported but only gates when
+--gate refs or --gate total is passed.
+
+Token counting uses tiktoken (cl100k_base) when installed, otherwise a
+chars/4 estimate. The baseline records which counter produced it, and
+`check` refuses to compare across counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = PLUGIN_ROOT / "scripts" / "token-baseline.json"
+
+SKILL_GLOBS = (
+    "skills/*/SKILL.md",
+    "lib/skills/*/SKILL.md",
+    "plugins/*/skills/*/SKILL.md",
+)
+COMMAND_GLOBS = (
+    "commands/*.md",
+    "plugins/*/commands/*.md",
+)
+TEXT_SUFFIXES = {".md", ".txt", ".py", ".sh", ".json", ".yaml", ".yml", ".toml"}
+
+
+def get_counter(name: str = "auto"):
+    """Return (counter_name, count_fn) for the requested tokenizer."""
+    if name in ("auto", "tiktoken"):
+        try:
+            import tiktoken
+
+            enc = tiktoken.get_encoding("cl100k_base")
+            return "tiktoken:cl100k_base", lambda text: len(
+                enc.encode(text, disallowed_special=())
+            )
+        except ImportError:
+            if name == "tiktoken":
+                print(
+                    "Error: tiktoken not installed. Run: pip install tiktoken",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+    return "approx:chars/4", lambda text: math.ceil(len(text) / 4)
+
+
+def measure(root: Path, count) -> dict[str, dict]:
+    """Return {unit: {"load", "refs", "files"}} for every skill and command."""
+    units: dict[str, dict] = {}
+
+    for pattern in SKILL_GLOBS:
+        for skill_md in sorted(root.glob(pattern)):
+            skill_dir = skill_md.parent
+            unit = skill_dir.relative_to(root).as_posix()
+            load = count(skill_md.read_text(errors="replace"))
+            files = {skill_md.relative_to(root).as_posix(): load}
+            refs = 0
+            ref_dir = skill_dir / "references"
+            if ref_dir.is_dir():
+                for ref in sorted(ref_dir.rglob("*")):
+                    if ref.is_file() and ref.suffix.lower() in TEXT_SUFFIXES:
+                        tokens = count(ref.read_text(errors="replace"))
+                        files[ref.relative_to(root).as_posix()] = tokens
+                        refs += tokens
+            units[unit] = {"load": load, "refs": refs, "files": files}
+
+    for pattern in COMMAND_GLOBS:
+        for cmd in sorted(root.glob(pattern)):
+            unit = cmd.relative_to(root).as_posix()
+            load = count(cmd.read_text(errors="replace"))
+            units[unit] = {"load": load, "refs": 0, "files": {unit: load}}
+
+    return units
+
+
+def metric(entry: dict, gate: str) -> int:
+    if gate == "total":
+        return entry["load"] + entry["refs"]
+    return entry[gate]
+
+
+def diff(
+    baseline: dict[str, dict],
+    current: dict[str, dict],
+    gate: str = "load",
+    threshold: float = 10.0,
+    min_delta: int = 50,
+) -> list[dict]:
+    """Compare footprints; return one row per unit that changed.
+
+    A row is flagged when the gated metric grew by more than threshold
+    percent AND by at least min_delta tokens (so tiny skills do not trip
+    the gate on a one-line edit). New units are flagged if their gated
+    metric alone exceeds min_delta.
+    """
+    rows = []
+    for unit in sorted(set(baseline) | set(current)):
+        old = baseline.get(unit)
+        new = current.get(unit)
+        before = metric(old, gate) if old else 0
+        after = metric(new, gate) if new else 0
+        if old and new and old["load"] == new["load"] and old["refs"] == new["refs"]:
+            continue
+        delta = after - before
+        pct = (delta / before * 100) if before else math.inf if after else 0.0
+        flagged = bool(new) and delta >= min_delta and pct > threshold
+        rows.append({
+            "unit": unit,
+            "status": "added" if not old else "removed" if not new else "changed",
+            "before": before,
+            "after": after,
+            "delta": delta,
+            "pct": pct,
+            "flagged": flagged,
+        })
+    return rows
+
+
+def print_report(units: dict[str, dict], counter: str) -> None:
+    print(f"Token footprint ({counter})\n")
+    print(f"{'unit':<48} {'load':>8} {'refs':>8} {'total':>8}")
+    print("-" * 75)
+    for unit, entry in sorted(units.items(), key=lambda kv: -kv[1]["load"]):
+        total = entry["load"] + entry["refs"]
+        print(f"{unit:<48} {entry['load']:>8,} {entry['refs']:>8,} {total:>8,}")
+    print("-" * 75)
+    load = sum(e["load"] for e in units.values())
+    refs = sum(e["refs"] for e in units.values())
+    print(f"{f'{len(units)} units':<48} {load:>8,} {refs:>8,} {load + refs:>8,}")
+
+
+def print_diff(rows: list[dict], gate: str, threshold: float, min_delta: int) -> None:
+    if not rows:
+        print("No footprint changes against baseline.")
+        return
+    print(f"Footprint changes (gate: {gate}, >{threshold:g}% and >={min_delta} tokens)\n")
+    print(f"{'':2}{'unit':<48} {'before':>8} {'after':>8} {'delta':>8} {'pct':>8}")
+    print("-" * 86)
+    for r in sorted(rows, key=lambda r: -r["delta"]):
+        pct = "new" if r["pct"] == math.inf else f"{r['pct']:+.1f}%"
+        mark = "! " if r["flagged"] else "  "
+        print(
+            f"{mark}{r['unit']:<48} {r['before']:>8,} {r['after']:>8,} "
+            f"{r['delta']:>+8,} {pct:>8}"
+        )
+    flagged = sum(r["flagged"] for r in rows)
+    print(f"\n{len(rows)} unit(s) changed, {flagged} over threshold.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure and gate the context-token footprint of skills."
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=PLUGIN_ROOT,
+        help="Plugin root to measure (default: this repository)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Baseline JSON path (default: scripts/token-baseline.json)",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=["auto", "tiktoken", "approx"],
+        default="auto",
+        help="Token counter (default: tiktoken if installed, else approx)",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_report = sub.add_parser("report", help="Print the current footprint")
+    p_report.add_argument("--json", action="store_true", help="Output as JSON")
+
+    sub.add_parser("baseline", help="Write the current footprint as the baseline")
+
+    p_check = sub.add_parser("check", help="Diff against baseline; exit 1 on regression")
+    p_check.add_argument(
+        "--gate",
+        choices=["load", "refs", "total"],
+        default="load",
+        help="Metric that must not regress (default: load)",
+    )
+    p_check.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent growth that flags a unit (default: 10)",
+    )
+    p_check.add_argument(
+        "--min-delta",
+        type=int,
+        default=50,
+        help="Minimum absolute token growth that flags a unit (default: 50)",
+    )
+    p_check.add_argument("--json", action="store_true", help="Output diff rows as JSON")
+
+    args = parser.parse_args()
+    root = args.root.resolve()
+
+    if args.command == "check":
+        if not args.baseline.exists():
+            print(f"Error: baseline not found: {args.baseline}", file=sys.stderr)
+            print("Create one with: python skill_tokens.py baseline", file=sys.stderr)
+            sys.exit(1)
+        stored = json.loads(args.baseline.read_text())
+        wanted = stored["counter"].split(":")[0]
+        if args.tokenizer != "auto" and args.tokenizer != wanted:
+            print(
+                f"Error: baseline was counted with {stored['counter']}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        counter, count = get_counter(wanted)
+        if counter != stored["counter"]:
+            print(
+                f"Error: baseline counter {stored['counter']} does not match {counter}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        rows = diff(
+            stored["units"],
+            measure(root, count),
+            gate=args.gate,
+            threshold=args.threshold,
+            min_delta=args.min_delta,
+        )
+        if args.json:
+            for r in rows:
+                if r["pct"] == math.inf:
+                    r["pct"] = None
+            print(json.dumps(rows, indent=2))
+        else:
+            print_diff(rows, args.gate, args.threshold, args.min_delta)
+        sys.exit(1 if any(r["flagged"] for r in rows) else 0)
+
+    counter, count = get_counter(args.tokenizer)
+    units = measure(root, count)
+
+    if args.command == "baseline":
+        data = {"counter": counter, "units": units}
+        args.baseline.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+        total = sum(e["load"] + e["refs"] for e in units.values())
+        print(f"Wrote baseline for {len(units)} units ({total:,} tokens) to {args.baseline}")
+        return
+
+    if args.json:
+        print(json.dumps({"counter": counter, "units": units}, indent=2))
+    else:
+        print_report(units, counter)
+
+
+if __name__ == "__main__":
+    main()
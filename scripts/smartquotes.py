@@ -5,6 +5,13 @@ Convert straight quotes to typographic (smart) quotes in markdown files.
 Usage:
     python smartquotes.py <file.md>
     python smartquotes.py <file.md> --check  # dry-run, show diff
+    python smartquotes.py <file.md> --lines 120:180  # only convert lines 120-180
+
+    # Batch mode: directories, globs, or several files
+    python smartquotes.py chapters/
+    python smartquotes.py "book/**/*.md" notes.md --jobs 8
+    python smartquotes.py chapters/ --check
+    python smartquotes.py chapters/ --no-cache
 
 Converts:
     "straight" → "curly"
@@ -13,16 +20,40 @@ Converts:
 
 Preserves:
     - Em dashes (—)
-    - Code blocks and inline code
+    - YAML/TOML frontmatter
+    - Fenced and indented code blocks, inline code spans
+    - Math: $...$, $$...$$, \(...\), \[...\]
+    - <pre>/<script>/<style> blocks, HTML tags and comments
+    - Link destinations and titles, HTML entities, backslash escapes
     - All other formatting
 
+Markdown is tokenized line by line, so files are streamed rather than
+loaded whole, and only the unprotected text between those spans is handed
+to smartypants.
+
+Batch mode converts files in a process pool and keeps a content-hash cache
+of files already known to be clean, so reruns skip unchanged files without
+converting them. Cache: $WORKFLOWS_CACHE_DIR/smartquotes/cache.json
+(default ~/.cache/workflows/smartquotes/cache.json).
+
 Requires: pip install smartypants
 """
 
+from __future__ import annotations
+
 import argparse
-import html
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
 
 try:
     import smartypants
@@ -30,56 +61,490 @@ except ImportError:
     print("Error: smartypants not installed. Run: pip install smartypants", file=sys.stderr)
     sys.exit(1)
 
+MARKDOWN_SUFFIXES = {".md", ".markdown"}
 
-def convert_quotes(text: str) -> str:
-    """Convert straight quotes to smart quotes, preserving code blocks."""
+# Bump when convert_quotes output changes so cached "clean" entries are rechecked
+CACHE_VERSION = 2
+
+# Placeholder for a protected inline span. A private-use character is
+# neither whitespace nor an opening bracket, so smartypants treats it like
+# a word when deciding whether an adjacent quote opens or closes.
+MASK = "\ue000"
+
+# smartypants outputs HTML entities; only these four are decoded, so entities
+# already present in the source (which are masked anyway) are left untouched
+QUOTE_ENTITIES = {
+    "&#8216;": "\u2018",
+    "&#8217;": "\u2019",
+    "&#8220;": "\u201c",
+    "&#8221;": "\u201d",
+}
+QUOTE_ENTITY_RE = re.compile("|".join(QUOTE_ENTITIES))
+
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^ {0,3}(?:[-*+]|\d{1,9}[.)])(?:\s|$)")
+HTML_BLOCK_RE = re.compile(r"^ {0,3}<(pre|script|style|textarea)[\s>]", re.IGNORECASE)
+
+INLINE_RE = re.compile(
+    r"""
+      (?P<texmath>\\\(.*?\\\)|\\\[.*?\\\])
+    | (?P<escape>\\[\\`*_{}\[\]()\#+\-.!"'$<>|~])
+    | (?P<code>`+)
+    | (?P<entity>&(?:\#[0-9]+|\#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);)
+    | (?P<link>\]\((?:[^()\s]|\([^()\s]*\))*(?:\s+(?:"[^"]*"|'[^']*'|\([^)]*\)))?\s*\))
+    | (?P<autolink><(?:https?|ftp|mailto):[^>\s]*>)
+    | (?P<dmath>\$\$.+?\$\$)
+    | (?P<math>\$(?=\S)(?:\\.|[^$\\])*?(?<=[^\s\\])\$(?!\d))
+    | (?P<mask>\ue000)
+    """,
+    re.VERBOSE,
+)
+
+
+def mask_inline(line: str) -> tuple[str, list[str]]:
+    """Replace protected inline spans with MASK; return (masked, spans)."""
+    out = []
+    spans = []
+    pos = 0
+    while True:
+        m = INLINE_RE.search(line, pos)
+        if not m:
+            break
+        start, end = m.span()
+        if m.lastgroup == "code":
+            # A code span closes at the next backtick run of the same length;
+            # an unmatched run is literal text
+            ticks = len(m.group())
+            close = re.compile(r"(?<!`)`{%d}(?!`)" % ticks).search(line, end)
+            if not close:
+                out.append(line[pos:end])
+                pos = end
+                continue
+            end = close.end()
+        out.append(line[pos:start])
+        out.append(MASK)
+        spans.append(line[start:end])
+        pos = end
+    out.append(line[pos:])
+    return "".join(out), spans
+
+
+def educate_line(line: str) -> str:
+    """Convert quotes in one line of Markdown text, skipping inline spans."""
+    if '"' not in line and "'" not in line:
+        return line
+    masked, spans = mask_inline(line)
+    if '"' not in masked and "'" not in masked:
+        return line
+    # Leading newline gives smartypants the same left context a line has
+    # inside a whole document (quotes at ^ are special-cased otherwise).
     # smartypants.Attr.q = quotes only (no dashes, ellipses, etc.)
-    converted = smartypants.smartypants(text, smartypants.Attr.q)
-    # smartypants outputs HTML entities; decode to Unicode
-    return html.unescape(converted)
+    converted = smartypants.smartypants("\n" + masked, smartypants.Attr.q)[1:]
+    converted = QUOTE_ENTITY_RE.sub(lambda m: QUOTE_ENTITIES[m.group()], converted)
+    if spans:
+        parts = converted.split(MASK)
+        converted = "".join(
+            part + (spans[i] if i < len(spans) else "") for i, part in enumerate(parts)
+        )
+    return converted
+
+
+class MarkdownQuoteConverter:
+    """Line-at-a-time Markdown tokenizer that converts quotes in prose only.
+
+    Tracks block state (frontmatter, fenced/indented code, math and raw HTML
+    blocks) across calls to feed(), so a document can be streamed without
+    holding it in memory. Lines outside the requested range are still fed
+    through the tokenizer to keep state correct, but are returned verbatim.
+    """
+
+    def __init__(self):
+        self.lineno = 0
+        self.block = None        # None | "frontmatter" | "fence" | "math" | "html" | "comment"
+        self.closer = ""         # what ends the current block
+        self.prev_blank = True
+        self.prev_indented_code = False
+        self.in_list = False
+
+    def feed(self, line: str, convert: bool = True) -> str:
+        """Process one line (with or without its line ending)."""
+        self.lineno += 1
+        body = line.rstrip("\r\n")
+        ending = line[len(body):]
+
+        if self._protected(body):
+            return line
+        if not convert:
+            return line
+        return educate_line(body) + ending
+
+    def _protected(self, body: str) -> bool:
+        """Advance block state for body; return True if it must not change."""
+        stripped = body.strip()
+        blank = not stripped
+
+        if self.block is not None:
+            self._close_block(body, stripped)
+            return True
+
+        if self.lineno == 1 and stripped in ("---", "+++"):
+            self.block, self.closer = "frontmatter", stripped
+            return True
+
+        fence = FENCE_RE.match(body)
+        if fence:
+            marker = fence.group(1)
+            # Backtick fences may not contain backticks in the info string
+            if marker[0] == "~" or "`" not in body[fence.end():]:
+                self.block, self.closer = "fence", marker
+                return True
+
+        if stripped.startswith("$$") and not (len(stripped) > 2 and stripped.endswith("$$")):
+            self.block, self.closer = "math", "$$"
+            return True
+        if stripped.startswith("\\[") and not stripped.endswith("\\]"):
+            self.block, self.closer = "math", "\\]"
+            return True
+        if stripped.startswith("$$") or (stripped.startswith("\\[") and stripped.endswith("\\]")):
+            self._after(blank=False, code=False)
+            return True
+
+        html = HTML_BLOCK_RE.match(body)
+        if html:
+            tag = html.group(1).lower()
+            if f"</{tag}>" not in body.lower():
+                self.block, self.closer = "html", f"</{tag}>"
+            self._after(blank=False, code=False)
+            return True
+        if stripped.startswith("<!--") and "-->" not in stripped[4:]:
+            self.block, self.closer = "comment", "-->"
+            return True
+
+        # Indented code: 4+ columns after a blank line (or continuing one),
+        # but not inside a list, where indentation means continuation
+        indented = body.startswith("    ") or body.startswith("\t")
+        if indented and not blank and not self.in_list and (
+            self.prev_blank or self.prev_indented_code
+        ):
+            self._after(blank=False, code=True)
+            return True
+
+        if LIST_ITEM_RE.match(body):
+            self.in_list = True
+        elif not blank and not indented and self.prev_blank:
+            self.in_list = False
+        self._after(blank=blank, code=False)
+        return False
+
+    def _close_block(self, body: str, stripped: str) -> None:
+        block, closer = self.block, self.closer
+        if block == "frontmatter":
+            done = stripped == closer or (closer == "---" and stripped == "...")
+        elif block == "fence":
+            done = re.match(r"^ {0,3}%s%s*\s*$" % (re.escape(closer), re.escape(closer[0])), body)
+        elif block in ("html", "comment"):
+            done = closer in body.lower()
+        else:
+            done = stripped.endswith(closer)
+        if done:
+            self.block, self.closer = None, ""
+            self._after(blank=False, code=False)
+
+    def _after(self, blank: bool, code: bool) -> None:
+        self.prev_blank = blank
+        self.prev_indented_code = code
+
+
+def convert_lines(
+    lines: Iterable[str], line_range: tuple[int, int] | None = None
+) -> Iterator[str]:
+    """Stream converted lines; line_range is 1-based and inclusive."""
+    converter = MarkdownQuoteConverter()
+    first, last = line_range or (1, sys.maxsize)
+    for line in lines:
+        lineno = converter.lineno + 1
+        yield converter.feed(line, convert=first <= lineno <= last)
+
+
+def convert_quotes(text: str) -> str:
+    """Convert straight quotes to smart quotes, preserving code and math."""
+    return "".join(convert_lines(text.splitlines(keepends=True)))
+
+
+def changed_lines(original: str, converted: str) -> list[tuple[int, str, str]]:
+    """Return (line number, before, after) for each line that differs."""
+    return [
+        (i, o, c)
+        for i, (o, c) in enumerate(zip(original.splitlines(), converted.splitlines()), 1)
+        if o != c
+    ]
+
+
+def print_changes(changes: list[tuple[int, str, str]]) -> None:
+    for i, o, c in changes:
+        print(f"Line {i}:")
+        print(f"  - {o[:80]}{'...' if len(o) > 80 else ''}")
+        print(f"  + {c[:80]}{'...' if len(c) > 80 else ''}")
+
+
+def cache_path() -> Path:
+    override = os.environ.get("WORKFLOWS_CACHE_DIR")
+    if override:
+        return Path(override) / "smartquotes" / "cache.json"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "workflows" / "smartquotes" / "cache.json"
+
+
+def load_cache(path: Path) -> dict:
+    """Load {abs path: [size, mtime_ns, sha256]} of files known to be clean."""
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_cache(path: Path, files: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}))
+    tmp.replace(path)
+
+
+def expand_inputs(inputs: list[str]) -> list[Path]:
+    """Expand files, directories and glob patterns into Markdown file paths."""
+    found: dict[Path, None] = {}
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = (
+                p for p in sorted(path.rglob("*"))
+                if p.suffix.lower() in MARKDOWN_SUFFIXES
+                and not any(part.startswith(".") for part in p.relative_to(path).parts)
+            )
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = (
+                Path(p) for p in sorted(glob.glob(item, recursive=True))
+                if Path(p).suffix.lower() in MARKDOWN_SUFFIXES
+            )
+        for p in candidates:
+            if p.is_file():
+                found.setdefault(p.resolve(), None)
+    return list(found)
+
+
+def process_file(path: Path, check: bool, known: list | None) -> dict:
+    """Convert one file; runs in a worker process.
+
+    `known` is the cached [size, mtime_ns, sha256] for a previously clean
+    file. A matching stat signature skips the read entirely; a matching
+    content hash skips the conversion.
+    """
+    result = {"path": str(path), "status": "error", "changes": [], "entry": None}
+    try:
+        st = path.stat()
+        if known and known[:2] == [st.st_size, st.st_mtime_ns]:
+            result["status"] = "cached"
+            result["entry"] = known
+            return result
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if known and known[2] == digest:
+            result["status"] = "cached"
+            result["entry"] = [st.st_size, st.st_mtime_ns, digest]
+            return result
+
+        original = data.decode()
+        converted = convert_quotes(original)
+        if original == converted:
+            result["status"] = "clean"
+            result["entry"] = [st.st_size, st.st_mtime_ns, digest]
+            return result
+
+        if check:
+            result["status"] = "would-change"
+            result["changes"] = changed_lines(original, converted)
+            return result
+
+        path.write_text(converted)
+        st = path.stat()
+        result["status"] = "converted"
+        result["entry"] = [
+            st.st_size,
+            st.st_mtime_ns,
+            hashlib.sha256(converted.encode()).hexdigest(),
+        ]
+    except (OSError, UnicodeDecodeError) as e:
+        result["error"] = str(e)
+    return result
+
+
+def parse_line_range(value: str) -> tuple[int, int]:
+    """Parse START:END (1-based, inclusive; either side may be omitted)."""
+    start, sep, end = value.partition(":")
+    try:
+        first = int(start) if start else 1
+        last = int(end) if end else (first if not sep else sys.maxsize)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid line range: {value!r}")
+    if first < 1 or last < first:
+        raise argparse.ArgumentTypeError(f"invalid line range: {value!r}")
+    return first, last
+
+
+def run_single(path: Path, check: bool, line_range: tuple[int, int] | None = None) -> int:
+    """Stream one file through the converter, printing per-line changes.
+
+    The converted text goes to a temporary file beside the original, which
+    replaces it only if something changed.
+    """
+    changes = 0
+    with open(path, encoding="utf-8", newline="") as src, tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", newline="", dir=path.parent, delete=False,
+        prefix=f".{path.name}.", suffix=".tmp",
+    ) as dst:
+        tmp = Path(dst.name)
+        try:
+            converter = MarkdownQuoteConverter()
+            first, last = line_range or (1, sys.maxsize)
+            for o in src:
+                i = converter.lineno + 1
+                if i > last:
+                    # Past the range nothing can change: copy the rest as-is
+                    if not check:
+                        dst.write(o)
+                        shutil.copyfileobj(src, dst)
+                    break
+                c = converter.feed(o, convert=i >= first)
+                if o != c:
+                    changes += 1
+                    if check:
+                        print_changes([(i, o.rstrip("\r\n"), c.rstrip("\r\n"))])
+                if not check:
+                    dst.write(c)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    if check or not changes:
+        tmp.unlink()
+        if check and changes:
+            print(f"\n{changes} line(s) would be changed.")
+        else:
+            print("No changes needed.")
+        return 0
+
+    tmp.chmod(path.stat().st_mode & 0o7777)
+    os.replace(tmp, path)
+    print(f"Converted quotes in {path}")
+    return 0
+
+
+def run_batch(paths: list[Path], check: bool, jobs: int | None, use_cache: bool) -> int:
+    """Convert many files in a process pool and print one summary."""
+    start = time.perf_counter()
+    cache_file = cache_path()
+    cache = load_cache(cache_file) if use_cache else {}
+
+    counts = {"converted": 0, "would-change": 0, "clean": 0, "cached": 0, "error": 0}
+    changed_total = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(process_file, p, check, cache.get(str(p))) for p in paths
+        ]
+        for future in futures:
+            r = future.result()
+            counts[r["status"]] += 1
+            if r["entry"]:
+                cache[r["path"]] = r["entry"]
+            else:
+                cache.pop(r["path"], None)
+
+            if r["status"] == "converted":
+                print(f"Converted quotes in {r['path']}")
+            elif r["status"] == "would-change":
+                changed_total += len(r["changes"])
+                print(f"{r['path']}:")
+                print_changes(r["changes"])
+                print()
+            elif r["status"] == "error":
+                print(f"Error: {r['path']}: {r['error']}", file=sys.stderr)
+
+    if use_cache:
+        save_cache(cache_file, cache)
+
+    elapsed = time.perf_counter() - start
+    changed = counts["would-change"] if check else counts["converted"]
+    verb = "would change" if check else "converted"
+    print(
+        f"{len(paths)} file(s) in {elapsed:.2f}s: {changed} {verb}, "
+        f"{counts['clean']} clean, {counts['cached']} unchanged (cached), "
+        f"{counts['error']} error(s)"
+    )
+    if check:
+        if changed:
+            print(f"{changed_total} line(s) would be changed.")
+        else:
+            print("No changes needed.")
+    return 1 if counts["error"] else 0
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Convert straight quotes to smart quotes in markdown files."
     )
-    parser.add_argument("file", type=Path, help="Markdown file to process")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Markdown files, directories, or glob patterns to process",
+    )
     parser.add_argument(
         "--check",
         action="store_true",
         help="Dry run: show what would change without modifying the file",
     )
+    parser.add_argument(
+        "--lines",
+        type=parse_line_range,
+        default=None,
+        metavar="START:END",
+        help="Single file only: convert just this 1-based, inclusive line range",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Worker processes for batch mode (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Batch mode: ignore and do not update the unchanged-file cache",
+    )
     args = parser.parse_args()
 
-    if not args.file.exists():
-        print(f"Error: {args.file} not found", file=sys.stderr)
-        sys.exit(1)
-
-    original = args.file.read_text()
-    converted = convert_quotes(original)
-
-    if args.check:
-        if original == converted:
-            print("No changes needed.")
-        else:
-            # Show simple before/after for changed lines
-            orig_lines = original.splitlines()
-            conv_lines = converted.splitlines()
-            changes = 0
-            for i, (o, c) in enumerate(zip(orig_lines, conv_lines), 1):
-                if o != c:
-                    changes += 1
-                    print(f"Line {i}:")
-                    print(f"  - {o[:80]}{'...' if len(o) > 80 else ''}")
-                    print(f"  + {c[:80]}{'...' if len(c) > 80 else ''}")
-            print(f"\n{changes} line(s) would be changed.")
-        sys.exit(0)
+    single = len(args.paths) == 1 and not Path(args.paths[0]).is_dir()
+    if single and not glob.has_magic(args.paths[0]):
+        path = Path(args.paths[0])
+        if not path.exists():
+            print(f"Error: {path} not found", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(run_single(path, args.check, args.lines))
 
-    if original == converted:
-        print("No changes needed.")
-    else:
-        args.file.write_text(converted)
-        print(f"Converted quotes in {args.file}")
+    if args.lines:
+        print("Error: --lines only applies to a single file", file=sys.stderr)
+        sys.exit(1)
+    paths = expand_inputs(args.paths)
+    if not paths:
+        print("Error: no markdown files matched", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(run_batch(paths, args.check, args.jobs, not args.no_cache))
 
 
 if __name__ == "__main__":
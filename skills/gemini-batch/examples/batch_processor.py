@@ -15,22 +15,191 @@ Example:
         prompt="Extract key information as JSON...",
         output_dir="./results"
     )
+
+Uploads, batch responses (token usage) and job wall time are appended to the
+usage ledger shared with look-at; report with
+    python3 skills/look-at/scripts/usage.py report --skill gemini-batch
 """
 
 from __future__ import annotations
 
 import os
+import sys
 import json
 import time
+import fcntl
+import base64
+import threading
 import hashlib
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Iterator, Optional
+from typing import Any, Iterator, Optional
 
 import google.generativeai as genai
+from google.api_core.exceptions import PreconditionFailed, ServerError, TooManyRequests
 from google.cloud import storage
 
+try:
+    import google_crc32c  # installed with google-cloud-storage
+except ImportError:
+    google_crc32c = None
+
+# The usage ledger (path, record schema, report) is look-at's scripts/usage.py;
+# without the look-at skill next to this one, nothing is recorded
+sys.path.append(str(Path(__file__).resolve().parents[2] / "look-at" / "scripts"))
+try:
+    import usage
+except ImportError:
+    usage = None
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_UPLOAD_WORKERS = 16
+
+# Batch API limits per job (see SKILL.md "Rate Limits"); shards stay under them
+MAX_REQUESTS_PER_JOB = 10_000
+MAX_JOB_BYTES = 100_000_000
+MAX_CONCURRENT_JOBS = 10
+# Quota/server/network errors are retried on later polls up to this many
+# submissions; any other submit error fails the shard at once
+MAX_SUBMIT_ATTEMPTS = 5
+
+FINAL_JOB_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+
+def workflows_cache_dir() -> Path:
+    base = os.environ.get("WORKFLOWS_CACHE_DIR")
+    if base:
+        return Path(base)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "workflows"
+
+
+def record_usage(model: str, **fields: Any) -> None:
+    """Append one gemini-batch record to the shared usage ledger."""
+    if usage is not None:
+        usage.record("gemini-batch", model, **fields)
+
+
+def usage_tokens(metadata: Optional[dict]) -> dict:
+    """Token counts from a batch response's usageMetadata, in ledger field names."""
+    return usage.tokens(metadata) if usage is not None else {}
+
+
+def file_hashes(local_path: str) -> dict[str, str]:
+    """Hash a file in one chunked read.
+
+    Returns:
+        {"md5": hex digest, "md5_b64": base64 digest as GCS reports it,
+         "crc32c_b64": base64 CRC32C as GCS reports it (if google-crc32c is installed)}
+    """
+    md5 = hashlib.md5()
+    crc = google_crc32c.Checksum() if google_crc32c else None
+    with open(local_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            md5.update(chunk)
+            if crc is not None:
+                crc.update(chunk)
+    hashes = {
+        "md5": md5.hexdigest(),
+        "md5_b64": base64.b64encode(md5.digest()).decode(),
+    }
+    if crc is not None:
+        hashes["crc32c_b64"] = base64.b64encode(crc.digest()).decode()
+    return hashes
+
+
+def plan_shards(
+    sizes: list[int],
+    max_requests: int = MAX_REQUESTS_PER_JOB,
+    max_bytes: int = MAX_JOB_BYTES
+) -> list[range]:
+    """Split consecutive requests into shards bounded by count and bytes.
+
+    Args:
+        sizes: Size in bytes of each request's JSONL line (newline included)
+        max_requests: Most requests per shard
+        max_bytes: Most bytes per shard
+
+    Returns:
+        Index ranges into sizes, one per shard, in order
+    """
+    shards, start, total = [], 0, 0
+    for i, size in enumerate(sizes):
+        if size > max_bytes:
+            raise ValueError(f"Request {i} alone is {size} bytes, over the {max_bytes}-byte job limit")
+        if i > start and (i - start == max_requests or total + size > max_bytes):
+            shards.append(range(start, i))
+            start, total = i, 0
+        total += size
+    if start < len(sizes):
+        shards.append(range(start, len(sizes)))
+    return shards
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed submission is worth retrying on the next poll."""
+    if isinstance(error, (FileNotFoundError, PermissionError)):
+        return False
+    return isinstance(error, (TooManyRequests, ServerError, OSError))
+
+
+def _state_name(job) -> str:
+    return getattr(job.state, "name", str(job.state))
+
+
+class HashManifest:
+    """Persistent (path, size, mtime) -> hashes map, so unchanged files are not read.
+
+    Upload fills it while hashing for the content-addressed blob name;
+    prepare_batch then takes request IDs from it instead of re-reading every
+    document. Only new or modified files are hashed again. Those are read
+    twice, once to hash and once to upload, because the blob name must be
+    known before the upload starts.
+
+    File: $WORKFLOWS_CACHE_DIR/gemini-batch/hashes.json
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or workflows_cache_dir() / "gemini-batch" / "hashes.json"
+        self.lock = threading.Lock()
+        self.changed: dict[str, dict] = {}
+        try:
+            self.entries: dict[str, dict] = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+
+    def hashes(self, local_path: str) -> dict[str, str]:
+        """Hashes of a file, computed only if it is new or its size/mtime changed."""
+        key = os.path.abspath(local_path)
+        st = os.stat(key)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, **file_hashes(key)}
+        with self.lock:
+            self.entries[key] = self.changed[key] = entry
+        return entry
+
+    def save(self) -> None:
+        """Merge new entries into the file (other processes may have added theirs)."""
+        with self.lock:
+            if not self.changed:
+                return
+            changed, self.changed = self.changed, {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = json.loads(self.path.read_text())
+            except (OSError, json.JSONDecodeError):
+                entries = {}
+            entries.update(changed)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entries))
+            tmp.replace(self.path)
+
 
 class GeminiBatchProcessor:
     """End-to-end batch processing for documents."""
@@ -60,9 +229,61 @@ class GeminiBatchProcessor:
         # Initialize GCS client
         self.storage_client = storage.Client()
         self.bucket = self.storage_client.bucket(bucket_name)
+        self.upload_stats: dict = {}
+        self.manifest = HashManifest()
+
+    @staticmethod
+    def _unchanged(blob, hashes: dict[str, str]) -> bool:
+        """Whether an existing blob already holds these bytes (md5, or crc32c for composite objects)."""
+        if blob is None:
+            return False
+        if blob.md5_hash:
+            return blob.md5_hash == hashes["md5_b64"]
+        return bool(blob.crc32c) and blob.crc32c == hashes.get("crc32c_b64")
+
+    def _upload(
+        self,
+        local_path: str,
+        gcs_prefix: str,
+        existing: Optional[dict] = None
+    ) -> tuple[str, int]:
+        """Upload one file unless its content is already in the bucket.
+
+        Returns:
+            (GCS URI, bytes sent; 0 if the blob was already there)
+        """
+        # New or changed files are read here and again by the upload; the
+        # content-addressed name has to exist before the upload starts
+        hashes = self.manifest.hashes(local_path)
+        blob_name = f"{gcs_prefix}/{hashes['md5']}{Path(local_path).suffix.lower()}"
+        gcs_uri = f"gs://{self.bucket_name}/{blob_name}"
+        current = existing.get(blob_name) if existing is not None else self.bucket.get_blob(blob_name)
+        if self._unchanged(current, hashes):
+            return gcs_uri, 0
+
+        blob = self.bucket.blob(blob_name)
+        start = time.perf_counter()
+        try:
+            # if_generation_match=0: only create, so identical files uploaded
+            # concurrently don't both write the same object
+            blob.upload_from_filename(
+                local_path, if_generation_match=None if current is not None else 0
+            )
+        except PreconditionFailed:
+            return gcs_uri, 0
+        size = os.path.getsize(local_path)
+        record_usage(
+            self.model, op="upload", seconds=round(time.perf_counter() - start, 3),
+            bytes_uploaded=size, file=str(local_path),
+        )
+        return gcs_uri, size
 
     def upload_file(self, local_path: str, gcs_prefix: str = "documents") -> str:
-        """Upload file to GCS.
+        """Upload file to GCS under a content-addressed name.
+
+        The blob is named by the file's MD5, so files with the same name in
+        different directories no longer overwrite each other, and a file
+        whose bytes are already in the bucket is not sent again.
 
         Args:
             local_path: Local file path
@@ -71,39 +292,75 @@ class GeminiBatchProcessor:
         Returns:
             GCS URI
         """
-        filename = Path(local_path).name
-        blob_name = f"{gcs_prefix}/{filename}"
-        blob = self.bucket.blob(blob_name)
-
-        blob.upload_from_filename(local_path)
-
-        return f"gs://{self.bucket_name}/{blob_name}"
+        gcs_uri, _ = self._upload(local_path, gcs_prefix)
+        self.manifest.save()
+        return gcs_uri
 
     def upload_directory(
         self,
         local_dir: str,
         gcs_prefix: str = "documents",
-        extensions: tuple = (".pdf", ".png", ".jpg", ".jpeg")
+        extensions: tuple = (".pdf", ".png", ".jpg", ".jpeg"),
+        workers: int = DEFAULT_UPLOAD_WORKERS
     ) -> list[tuple[str, str]]:
-        """Upload all matching files from directory.
+        """Upload all matching files from directory, workers at a time.
+
+        Existing blobs under gcs_prefix are listed once up front; files whose
+        md5/crc32c match are skipped. Throughput is printed and kept in
+        self.upload_stats.
 
         Args:
             local_dir: Local directory path
             gcs_prefix: GCS path prefix
             extensions: File extensions to include
+            workers: Concurrent uploads
 
         Returns:
             List of (local_path, gcs_uri) tuples
         """
-        uploaded = []
-
-        for path in Path(local_dir).rglob("*"):
-            if path.suffix.lower() in extensions:
-                gcs_uri = self.upload_file(str(path), gcs_prefix)
-                uploaded.append((str(path), gcs_uri))
-                print(f"Uploaded: {path.name}")
+        paths = sorted(
+            str(path) for path in Path(local_dir).rglob("*")
+            if path.is_file() and path.suffix.lower() in extensions
+        )
+        existing = {blob.name: blob for blob in self.bucket.list_blobs(prefix=f"{gcs_prefix}/")}
 
-        return uploaded
+        start = time.perf_counter()
+        uris: dict[str, str] = {}
+        sent_files = sent_bytes = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(self._upload, path, gcs_prefix, existing): path for path in paths
+                }
+                for future in as_completed(futures):
+                    path = futures[future]
+                    uris[path], sent = future.result()
+                    if sent:
+                        sent_files += 1
+                        sent_bytes += sent
+                        print(f"Uploaded: {Path(path).name}")
+                    else:
+                        print(f"Unchanged: {Path(path).name}")
+        finally:
+            # Keep the hashes of files done so far, even if one upload failed
+            self.manifest.save()
+        elapsed = max(time.perf_counter() - start, 1e-9)
+
+        self.upload_stats = {
+            "files": len(paths),
+            "uploaded": sent_files,
+            "unchanged": len(paths) - sent_files,
+            "bytes_uploaded": sent_bytes,
+            "seconds": round(elapsed, 3),
+            "files_per_second": round(len(paths) / elapsed, 2),
+            "mb_per_second": round(sent_bytes / 1e6 / elapsed, 2),
+        }
+        print(
+            f"Uploaded {sent_files} of {len(paths)} files ({len(paths) - sent_files} unchanged) "
+            f"in {elapsed:.1f}s: {self.upload_stats['files_per_second']} files/s, "
+            f"{self.upload_stats['mb_per_second']} MB/s"
+        )
+        return [(path, uris[path]) for path in paths]
 
     def create_request(
         self,
@@ -184,22 +441,71 @@ class GeminiBatchProcessor:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = f"/tmp/batch_requests_{timestamp}.jsonl"
 
+        with open(output_path, 'w') as f:
+            f.writelines(self._request_lines(files, prompt))
+
+        print(f"Created batch file with {len(files)} requests: {output_path}")
+        return output_path
+
+    def _request_lines(self, files: list[tuple[str, str]], prompt: str) -> list[str]:
+        """One JSONL line per file, with idempotent request IDs."""
         # Hash prompt for request ID versioning
         prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:6]
 
-        with open(output_path, 'w') as f:
-            for local_path, gcs_uri in files:
-                # Generate unique request ID
-                file_hash = hashlib.md5(
-                    Path(local_path).read_bytes()
-                ).hexdigest()[:8]
-                request_id = f"{Path(local_path).stem}_{file_hash}_{prompt_hash}"
+        lines = []
+        for local_path, gcs_uri in files:
+            # Generate unique request ID (hash from the manifest: files
+            # hashed during upload are not read again)
+            file_hash = self.manifest.hashes(local_path)["md5"][:8]
+            request_id = f"{Path(local_path).stem}_{file_hash}_{prompt_hash}"
 
-                request = self.create_request(gcs_uri, prompt, request_id)
-                f.write(json.dumps(request) + '\n')
+            request = self.create_request(gcs_uri, prompt, request_id)
+            lines.append(json.dumps(request) + '\n')
 
-        print(f"Created batch file with {len(files)} requests: {output_path}")
-        return output_path
+        self.manifest.save()
+        return lines
+
+    def prepare_shards(
+        self,
+        files: list[tuple[str, str]],
+        prompt: str,
+        output_dir: str = None,
+        max_requests: int = MAX_REQUESTS_PER_JOB,
+        max_bytes: int = MAX_JOB_BYTES,
+        workers: int = 8
+    ) -> list[str]:
+        """Prepare JSONL shards that each fit in one batch job.
+
+        Args:
+            files: List of (local_path, gcs_uri) tuples
+            prompt: Extraction prompt
+            output_dir: Directory for shard_NNN.jsonl (auto-generated if None)
+            max_requests: Most requests per shard
+            max_bytes: Most bytes per shard
+            workers: Shards written concurrently
+
+        Returns:
+            Shard paths, in request order
+        """
+        if output_dir is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_dir = f"/tmp/batch_requests_{timestamp}"
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        lines = self._request_lines(files, prompt)
+        shards = plan_shards([len(line.encode()) for line in lines], max_requests, max_bytes)
+
+        def write(index: int) -> str:
+            path = str(Path(output_dir) / f"shard_{index:03d}.jsonl")
+            with open(path, 'w') as f:
+                f.writelines(lines[i] for i in shards[index])
+            return path
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(write, range(len(shards))))
+
+        print(f"Created {len(paths)} shard(s) with {len(lines)} requests in {output_dir}")
+        return paths
 
     def submit_job(
         self,
@@ -276,6 +582,173 @@ class GeminiBatchProcessor:
 
             time.sleep(poll_interval)
 
+    @staticmethod
+    def run_path(run_name: str) -> Path:
+        return workflows_cache_dir() / "gemini-batch" / "runs" / f"{run_name}.json"
+
+    def _save_run(self, run: dict) -> None:
+        path = self.run_path(run["name"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(run, indent=2))
+        tmp.replace(path)
+
+    def load_run(self, run_name: str) -> dict:
+        """Read a logical run saved by start_run."""
+        return json.loads(self.run_path(run_name).read_text())
+
+    def start_run(
+        self,
+        shard_paths: list[str],
+        run_name: str = None,
+        max_concurrent: int = MAX_CONCURRENT_JOBS
+    ) -> dict:
+        """Track shards as one logical run and submit the first max_concurrent.
+
+        The run is saved to $WORKFLOWS_CACHE_DIR/gemini-batch/runs/<name>.json,
+        so wait_for_run can continue it from another process.
+
+        Returns:
+            Run dict: {"name", "max_concurrent", "shards": [{"path", "job_name",
+            "job", "state", "output_uri"}]}; shards also get "attempts" and,
+            after a failure, "error"
+        """
+        if run_name is None:
+            run_name = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        run = {
+            "name": run_name,
+            "model": self.model,
+            "max_concurrent": max_concurrent,
+            "created_at": time.time(),
+            "shards": [
+                {
+                    "path": path,
+                    "job_name": f"{run_name}_shard{i:03d}",
+                    "job": None,
+                    "state": "PENDING",
+                    "output_uri": f"gs://{self.bucket_name}/batch_outputs/{run_name}_shard{i:03d}/",
+                }
+                for i, path in enumerate(shard_paths)
+            ],
+        }
+        self._poll_run(run)
+        return run
+
+    def _poll_run(self, run: dict) -> bool:
+        """Refresh running shards and submit pending ones into free slots.
+
+        Returns:
+            True once every shard has reached a final state
+        """
+        try:
+            for shard in run["shards"]:
+                if shard["job"] and shard["state"] not in FINAL_JOB_STATES:
+                    job = genai.batches.get(name=shard["job"])
+                    shard["state"] = _state_name(job)
+                    if shard["state"] == "JOB_STATE_FAILED":
+                        shard["error"] = str(job.error)
+
+            running = sum(1 for s in run["shards"] if s["job"] and s["state"] not in FINAL_JOB_STATES)
+            pending = [
+                s for s in run["shards"] if s["job"] is None and s["state"] not in FINAL_JOB_STATES
+            ]
+            batch = pending[:max(0, run["max_concurrent"] - running)]
+
+            def submit(shard: dict) -> None:
+                shard["attempts"] = shard.get("attempts", 0) + 1
+                try:
+                    job = self.submit_job(shard["path"], shard["job_name"])
+                except Exception as e:
+                    shard["error"] = f"{type(e).__name__}: {e}"
+                    if _is_transient(e) and shard["attempts"] < MAX_SUBMIT_ATTEMPTS:
+                        # Stays pending and is retried next poll
+                        print(f"Submitting {shard['job_name']} failed, will retry: {e}")
+                    else:
+                        # merge_run reports the shard's requests as failed
+                        shard["state"] = "JOB_STATE_FAILED"
+                        print(f"Submitting {shard['job_name']} failed, giving up: {e}")
+                    return
+                shard["job"] = job.name
+                shard["state"] = _state_name(job)
+                shard.pop("error", None)
+
+            if batch:
+                with ThreadPoolExecutor(max_workers=len(batch)) as pool:
+                    list(pool.map(submit, batch))
+        finally:
+            # Job names of submitted shards must survive any error, or a
+            # resume would submit (and bill) them again
+            self._save_run(run)
+        return all(s["state"] in FINAL_JOB_STATES for s in run["shards"])
+
+    def wait_for_run(
+        self,
+        run_name: str,
+        poll_interval: int = 60,
+        timeout: int = 86400
+    ) -> dict:
+        """Keep a run's shards flowing through the job slots until all finish.
+
+        Failed or cancelled shards don't stop the run; merge_run reports
+        their requests as failed.
+
+        Returns:
+            The finished run dict
+        """
+        run = self.load_run(run_name)
+        start = time.time()
+
+        while not self._poll_run(run):
+            elapsed = time.time() - start
+            states: dict[str, int] = {}
+            for shard in run["shards"]:
+                states[shard["state"]] = states.get(shard["state"], 0) + 1
+            summary = ", ".join(f"{n} {state}" for state, n in sorted(states.items()))
+            print(f"[{elapsed:.0f}s] Run {run_name}: {summary}")
+
+            if elapsed > timeout:
+                raise TimeoutError(f"Run {run_name} timed out after {timeout}s")
+
+            time.sleep(poll_interval)
+
+        record_usage(
+            self.model, op="batch-job", seconds=round(time.time() - run["created_at"], 3),
+            job=run_name, shards=len(run["shards"]),
+        )
+        return run
+
+    def merge_run(self, run: dict, output_dir: str) -> list[dict]:
+        """Download every shard's results and merge them by request_id.
+
+        Returns:
+            One result per request, in the order of the shard files; requests
+            without a response (failed shard, dropped line) have success False
+        """
+        by_id: dict[str, dict] = {}
+        for shard in run["shards"]:
+            if shard["state"] != "JOB_STATE_SUCCEEDED":
+                continue
+            local_dir = str(Path(output_dir) / shard["job_name"])
+            for result_file in self.download_results(shard["output_uri"], local_dir):
+                for result in self.parse_results(result_file):
+                    by_id[result["request_id"]] = result
+
+        merged = []
+        for shard in run["shards"]:
+            with open(shard["path"]) as f:
+                for line in f:
+                    request_id = json.loads(line)["metadata"]["request_id"]
+                    merged.append(by_id.get(request_id) or {
+                        "request_id": request_id,
+                        "success": False,
+                        "error": shard.get("error") or f"no response ({shard['state']})",
+                        "raw_text": None,
+                        "parsed_data": None,
+                        "usage": usage_tokens(None),
+                        "missing": True,
+                    })
+        return merged
+
     def download_results(self, output_prefix: str, local_dir: str) -> list[str]:
         """Download result files.
 
@@ -318,6 +791,8 @@ class GeminiBatchProcessor:
                 response = entry.get("response", {})
                 candidates = response.get("candidates", [])
 
+                usage = usage_tokens(response.get("usageMetadata"))
+
                 if candidates:
                     text = (
                         candidates[0]
@@ -334,7 +809,8 @@ class GeminiBatchProcessor:
                         "success": True,
                         "raw_text": text,
                         "parsed_data": parsed,
-                        "finish_reason": candidates[0].get("finishReason")
+                        "finish_reason": candidates[0].get("finishReason"),
+                        "usage": usage
                     }
                 else:
                     yield {
@@ -342,7 +818,8 @@ class GeminiBatchProcessor:
                         "success": False,
                         "error": response.get("error"),
                         "raw_text": None,
-                        "parsed_data": None
+                        "parsed_data": None,
+                        "usage": usage
                     }
 
     def _extract_json(self, text: str) -> Optional[dict]:
@@ -402,41 +879,43 @@ class GeminiBatchProcessor:
         if not files:
             raise ValueError(f"No files found in {input_dir}")
 
-        # Step 2: Prepare batch
+        # Step 2: Prepare batch (sharded to the per-job limits)
         print("=" * 50)
-        print("Step 2: Preparing batch request...")
-        jsonl_path = self.prepare_batch(files, prompt)
+        print("Step 2: Preparing batch requests...")
+        shard_paths = self.prepare_shards(files, prompt)
 
-        # Step 3: Submit job
+        # Step 3: Submit jobs, at most MAX_CONCURRENT_JOBS at a time
         print("=" * 50)
-        print("Step 3: Submitting batch job...")
-        job = self.submit_job(jsonl_path)
+        print("Step 3: Submitting batch jobs...")
+        run = self.start_run(shard_paths)
 
         if not wait:
             return {
-                "job_name": job.name,
+                "run_name": run["name"],
+                "jobs": [s["job"] for s in run["shards"] if s["job"]],
                 "status": "submitted",
-                "files_count": len(files)
+                "shards": len(shard_paths),
+                "files_count": len(files),
+                "upload_stats": self.upload_stats
             }
 
-        # Step 4: Wait for completion
+        # Step 4: Wait for completion (submitting queued shards as slots free up)
         print("=" * 50)
         print("Step 4: Waiting for completion...")
-        job = self.wait_for_job(job.name)
+        run = self.wait_for_run(run["name"])
 
-        # Step 5: Download results
+        # Step 5-6: Download, parse and merge results by request_id
         print("=" * 50)
-        print("Step 5: Downloading results...")
-        output_prefix = f"gs://{self.bucket_name}/batch_outputs/"
-        result_files = self.download_results(output_prefix, output_dir)
+        print("Step 5: Downloading and merging results...")
+        all_results = self.merge_run(run, output_dir)
 
-        # Step 6: Parse results
-        print("=" * 50)
-        print("Step 6: Parsing results...")
-        all_results = []
-        for result_file in result_files:
-            for result in self.parse_results(result_file):
-                all_results.append(result)
+        # Usage: one record per response (tokens); wait_for_run records the run
+        for result in all_results:
+            if not result.get("missing"):
+                record_usage(
+                    self.model, op="batch", source="model", requests=1,
+                    **result["usage"], request_id=result["request_id"],
+                )
 
         # Summary
         success_count = sum(1 for r in all_results if r["success"])
@@ -446,12 +925,18 @@ class GeminiBatchProcessor:
         print(f"  Total files: {len(files)}")
         print(f"  Successful: {success_count}")
         print(f"  Failed: {len(all_results) - success_count}")
+        failed_shards = [s for s in run["shards"] if s["state"] != "JOB_STATE_SUCCEEDED"]
+        if failed_shards:
+            print(f"  Shards not succeeded: {', '.join(s['job_name'] for s in failed_shards)}")
 
         return {
-            "job_name": job.name,
+            "run_name": run["name"],
+            "jobs": [s["job"] for s in run["shards"]],
             "status": "completed",
+            "shards": len(shard_paths),
             "files_count": len(files),
             "success_count": success_count,
+            "upload_stats": self.upload_stats,
             "results": all_results
         }
 
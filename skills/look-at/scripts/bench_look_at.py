@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Benchmark look_at.py's request modes offline against fake_gemini.py.
+
+Starts the fake API in-process, writes deterministic fixture files to a
+temporary directory and runs each mode with a fresh upload registry and
+answer cache, so results depend only on the options below:
+
+    upload    upload, generate, delete per file (--no-reuse, inline off)
+    reuse     a second goal per file, against uploads made by an untimed first pass
+    inline    bytes sent inside the generate request
+    batch     analyze_many over all files, --jobs at a time
+    cache     the inline questions asked again (answer cache hits)
+
+Usage:
+    python3 bench_look_at.py [--files 16] [--size-kb 200] [--latency 0.2]
+                             [--bandwidth 20] [--jobs 8] [--fail 429=0.05] [--json]
+
+Requires: google-genai (the real client is used, pointed at the fake)
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+from fake_gemini import FakeGemini, parse_failures, start_in_thread
+
+
+def make_fixtures(directory: Path, count: int, size_kb: int, seed: int) -> list[str]:
+    """count distinct text files of about size_kb each, identical for a given seed."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = directory / f"doc{i:03d}.txt"
+        path.write_text(rng.randbytes(size_kb * 512).hex())
+        paths.append(str(path))
+    return paths
+
+
+def _summary(name: str, seconds: list[float], wall: float, failures: int, before: dict, after: dict) -> dict:
+    ordered = sorted(seconds)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None
+    return {
+        "mode": name,
+        "calls": len(seconds) + failures,
+        "failed": failures,
+        "wall_seconds": round(wall, 3),
+        "mean_seconds": round(statistics.fmean(seconds), 3) if seconds else None,
+        "p50_seconds": round(statistics.median(seconds), 3) if seconds else None,
+        "p95_seconds": round(p95, 3) if p95 is not None else None,
+        "http_requests": after.get("requests", 0) - before.get("requests", 0),
+        "mb_sent": round((after.get("bytes_received", 0) - before.get("bytes_received", 0)) / 1e6, 2),
+    }
+
+
+async def _sequential(look_at, client, files, goal, **options) -> tuple[list[float], int]:
+    seconds, failures = [], 0
+    for path in files:
+        try:
+            result = await look_at._analyze(client, path, goal, "gemini-2.5-flash-lite", **options)
+            seconds.append(result["seconds"])
+        except Exception:
+            failures += 1
+    return seconds, failures
+
+
+def run_benchmark(args: argparse.Namespace) -> list[dict]:
+    fake = FakeGemini(
+        latency=args.latency, bandwidth=args.bandwidth,
+        failures=parse_failures(args.fail), hang=args.hang, seed=args.seed,
+    )
+    server = start_in_thread(fake)
+    workdir = Path(tempfile.mkdtemp(prefix="look-at-bench-"))
+    os.environ.update({
+        "GOOGLE_GEMINI_BASE_URL": server.base_url,
+        "GOOGLE_API_KEY": "fake",
+        "WORKFLOWS_CACHE_DIR": str(workdir / "cache"),
+        # Measure the modes, not the client-side pacing (retries stay on)
+        "LOOK_AT_RPM": "0",
+    })
+    import look_at
+
+    files = make_fixtures(workdir, args.files, args.size_kb, args.seed)
+    # Everything but the inline modes must exceed the inline threshold
+    no_inline = dict(inline_max_bytes=0)
+
+    def stats() -> dict:
+        with fake.lock:
+            return dict(fake.stats)
+
+    async def scenario(name, coro_factory, prepare=None):
+        client = look_at.genai.Client(api_key="fake")
+        if prepare is not None:
+            await prepare(client)
+        before, start = stats(), time.perf_counter()
+        seconds, failures = await coro_factory(client)
+        results.append(_summary(name, seconds, time.perf_counter() - start, failures, before, stats()))
+
+    async def batch(client):
+        records = await look_at.analyze_many(
+            files, "Summarize for the batch", jobs=args.jobs, out=io.StringIO(),
+            client=client, use_cache=False,
+        )
+        ok = [r["seconds"] for r in records if r["ok"]]
+        return ok, len(records) - len(ok)
+
+    async def first_pass(client):
+        await _sequential(look_at, client, files, "First question", use_cache=False, **no_inline)
+
+    async def main():
+        await scenario("upload", lambda c: _sequential(
+            look_at, c, files, "Summarize", use_cache=False, reuse_uploads=False, **no_inline))
+        await scenario("reuse", lambda c: _sequential(
+            look_at, c, files, "Second question", use_cache=False, **no_inline), prepare=first_pass)
+        await scenario("inline", lambda c: _sequential(look_at, c, files, "Summarize inline"))
+        await scenario("batch", batch)
+        await scenario("cache", lambda c: _sequential(look_at, c, files, "Summarize inline"))
+
+    results: list[dict] = []
+    try:
+        asyncio.run(main())
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark look-at modes against the offline fake API")
+    parser.add_argument("--files", type=int, default=16, help="Number of fixture files (default: 16)")
+    parser.add_argument("--size-kb", type=int, default=200, help="Size of each fixture file (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency in seconds (default: 0.2)")
+    parser.add_argument("--bandwidth", type=float, default=20.0, help="Fake upload throughput in MB/s (default: 20)")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="Concurrency for the batch mode (default: 8)")
+    parser.add_argument("--fail", action="append", default=[], help="Inject failures, e.g. 429=0.05; repeatable")
+    parser.add_argument("--hang", type=float, default=2.0, help="Seconds an injected timeout holds the connection")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for fixtures and failure draws (default: 0)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.files} files x {args.size_kb} KB, latency {args.latency}s, "
+          f"bandwidth {args.bandwidth or 'unlimited'} MB/s, jobs {args.jobs}")
+    columns = ["mode", "calls", "failed", "wall_seconds", "mean_seconds", "p50_seconds",
+               "p95_seconds", "http_requests", "mb_sent"]
+    print("  ".join(f"{c:>13}" for c in columns))
+    for row in results:
+        print("  ".join(f"{'-' if row[c] is None else row[c]:>13}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the parts of the Gemini API that look_at.py uses.
+
+Implements file upload (resumable protocol), files get/delete, models get,
+generateContent and streamGenerateContent over plain HTTP, with answers
+derived deterministically from the request: the same bytes and goal always
+get the same text. google-genai is pointed at it through
+GOOGLE_GEMINI_BASE_URL, so look_at.py runs unmodified with any API key.
+
+    python3 fake_gemini.py --port 8765 --latency 0.3 --fail 429=0.1 &
+    export GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:8765 GOOGLE_API_KEY=fake
+    python3 look_at.py --file shot.png --goal "Describe it"
+
+Knobs:
+    --latency S [--jitter S]   time before a generate response starts
+    --tokens-per-second N      streaming pace (answers are split into words)
+    --bandwidth MBPS           upload/inline body throughput
+    --rpm N                    requests per minute; excess gets 429 + Retry-After
+    --fail CODE=P              inject 429, 500, 503 or timeout (connection held
+                               --hang seconds, then dropped) with probability P
+    --drop-fields P            omit each key of a JSON-schema reply with probability P
+    --seed N                   error and jitter draws are reproducible per seed
+
+GET /_fake/stats returns request, byte and injected-error counters.
+Requires only the standard library.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import json
+import time
+import uuid
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+FILE_LIFETIME = timedelta(hours=48)
+
+# Rough Gemini accounting: one media part costs one 768px tile
+MEDIA_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+STATUS_NAMES = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+def _get(obj: dict[str, Any], camel: str) -> Any:
+    """Field by its JSON name; nested parts may arrive in snake_case."""
+    snake = re.sub(r"([A-Z])", lambda m: "_" + m.group(1).lower(), camel)
+    return obj.get(camel, obj.get(snake))
+
+
+def _b64decode(data: str) -> bytes:
+    """Standard or URL-safe base64, padded or not."""
+    return base64.urlsafe_b64decode(data.replace("+", "-").replace("/", "_") + "=" * (-len(data) % 4))
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeGemini:
+    """State and behavior shared by all request handler threads."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tokens_per_second: float = 0.0,
+        bandwidth: float = 0.0,
+        rpm: int = 0,
+        failures: dict[str, float] | None = None,
+        hang: float = 10.0,
+        retry_after: float = 1.0,
+        drop_fields: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.bandwidth = bandwidth * 1e6
+        self.rpm = rpm
+        self.failures = failures or {}
+        self.hang = hang
+        self.retry_after = retry_after
+        self.drop_fields = drop_fields
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.files: dict[str, dict[str, Any]] = {}
+        self.sessions: dict[str, dict[str, Any]] = {}
+        self.window: list[float] = []
+        self.stats: dict[str, int] = {}
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def draw(self) -> tuple[str | None, float]:
+        """Pick an injected failure (or None) and this request's jitter."""
+        with self.lock:
+            roll = self.random.random()
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        for kind, probability in self.failures.items():
+            if roll < probability:
+                return kind, jitter
+            roll -= probability
+        return None, jitter
+
+    def over_rate(self) -> bool:
+        """Sliding one-minute window against --rpm."""
+        if not self.rpm:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 60]
+            if len(self.window) >= self.rpm:
+                return True
+            self.window.append(now)
+            return False
+
+    def transfer(self, size: int) -> None:
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+
+    # -- files ---------------------------------------------------------------
+
+    def create_file(self, meta: dict[str, Any], data: bytes, base_url: str) -> dict[str, Any]:
+        file_id = (meta.get("name") or "").removeprefix("files/") or uuid.uuid4().hex[:12]
+        now = datetime.now(timezone.utc)
+        entry = {
+            "name": f"files/{file_id}",
+            "displayName": _get(meta, "displayName") or file_id,
+            "mimeType": _get(meta, "mimeType") or "application/octet-stream",
+            "sizeBytes": str(len(data)),
+            "createTime": _timestamp(now),
+            "updateTime": _timestamp(now),
+            "expirationTime": _timestamp(now + FILE_LIFETIME),
+            "sha256Hash": base64.b64encode(hashlib.sha256(data).hexdigest().encode()).decode(),
+            "uri": f"{base_url}/v1beta/files/{file_id}",
+            "state": "ACTIVE",
+            "source": "UPLOADED",
+        }
+        with self.lock:
+            self.files[entry["name"]] = {"meta": entry, "data": data}
+        return entry
+
+    def file_for_uri(self, uri: str) -> dict[str, Any] | None:
+        name = "files/" + uri.rstrip("/").rsplit("/", 1)[-1]
+        with self.lock:
+            return self.files.get(name)
+
+    # -- generation ----------------------------------------------------------
+
+    def answer(self, model: str, body: dict[str, Any]) -> tuple[str, dict[str, int]] | tuple[None, str]:
+        """Deterministic answer text and usage, or (None, missing file uri)."""
+        digest = hashlib.sha256(model.encode())
+        prompt_chars = 0
+        media = []
+        for content in body.get("contents", []):
+            for part in content.get("parts", []):
+                if "text" in part:
+                    digest.update(part["text"].encode())
+                    prompt_chars += len(part["text"])
+                elif "inlineData" in part:
+                    inline = part["inlineData"]
+                    data = _b64decode(inline["data"])
+                    digest.update(data)
+                    media.append(("inline", _get(inline, "mimeType"), len(data)))
+                elif "fileData" in part:
+                    uri = _get(part["fileData"], "fileUri")
+                    stored = self.file_for_uri(uri)
+                    if stored is None:
+                        return None, uri
+                    digest.update(stored["data"])
+                    media.append(("file", stored["meta"]["mimeType"], len(stored["data"])))
+        goal = ""
+        for content in body.get("contents", []):
+            for part in content.get("parts", []):
+                m = re.search(r"Goal:\s*(.+)", part.get("text", ""))
+                if m:
+                    goal = m.group(1).strip()
+        described = ", ".join(f"{kind} {mime} ({size:,} bytes)" for kind, mime, size in media) or "no media"
+        text = (
+            f"Fake answer {digest.hexdigest()[:12]} from {model} about {described}. "
+            f"Goal: {goal or 'none given'}"
+        )
+        config = body.get("generationConfig") or {}
+        schema = _get(config, "responseSchema") or _get(config, "responseJsonSchema") or {}
+        if schema.get("properties"):
+            # Structured reply: one value per property, some dropped if asked to
+            reply = {}
+            for name in schema["properties"]:
+                with self.lock:
+                    dropped = self.random.random() < self.drop_fields
+                if dropped:
+                    self.count("dropped_fields")
+                else:
+                    reply[name] = f"Fake {name} {digest.hexdigest()[:8]} about {described}"
+            text = json.dumps(reply)
+        usage = {
+            "promptTokenCount": prompt_chars // CHARS_PER_TOKEN + MEDIA_TOKENS * len(media),
+            "candidatesTokenCount": max(1, len(text) // CHARS_PER_TOKEN),
+        }
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+        return text, usage
+
+
+def _response(text: str, usage: dict[str, int], model: str, finish: bool = True) -> dict[str, Any]:
+    candidate: dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate], "usageMetadata": usage, "modelVersion": model}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: "FakeServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def fake(self) -> FakeGemini:
+        return self.server.fake
+
+    @property
+    def base_url(self) -> str:
+        return self.server.base_url
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        self.fake.count("bytes_received", len(data))
+        return data
+
+    def _send(self, status: int, payload: Any = None, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload if payload is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        self.fake.count(f"error_{status}")
+        error = {"code": status, "message": message, "status": STATUS_NAMES.get(status, "UNKNOWN")}
+        self._send(status, {"error": error}, headers)
+
+    def _inject(self) -> bool:
+        """Apply rate limit and injected failures; True if the request was answered."""
+        if self.fake.over_rate():
+            self._error(429, "Rate limit exceeded (--rpm)", {"Retry-After": f"{self.fake.retry_after:g}"})
+            return True
+        failure, self.jitter = self.fake.draw()
+        if failure is None:
+            return False
+        self.fake.count(f"injected_{failure}")
+        if failure == "timeout":
+            time.sleep(self.fake.hang)
+            self.close_connection = True
+            return True
+        status = int(failure)
+        headers = {"Retry-After": f"{self.fake.retry_after:g}"} if status in (429, 503) else None
+        self._error(status, f"Injected {status}", headers)
+        return True
+
+    # -- routing -------------------------------------------------------------
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/_fake/stats":
+            with self.fake.lock:
+                stats = dict(self.fake.stats, files=len(self.fake.files))
+            return self._send(200, stats)
+        self.fake.count("requests")
+        m = re.fullmatch(r"/v1beta/(files/[^/]+)", path)
+        if m:
+            self.fake.count("files.get")
+            stored = self.fake.files.get(m.group(1))
+            if stored is None:
+                return self._error(403, f"File {m.group(1)} does not exist or you lack permission")
+            return self._send(200, stored["meta"])
+        m = re.fullmatch(r"/v1beta/(models/[^/:]+)", path)
+        if m:
+            self.fake.count("models.get")
+            return self._send(200, {"name": m.group(1), "displayName": m.group(1)})
+        self._error(404, f"Unknown path {path}")
+
+    def do_DELETE(self):
+        path = urlparse(self.path).path
+        self.fake.count("requests")
+        m = re.fullmatch(r"/v1beta/(files/[^/]+)", path)
+        if not m:
+            return self._error(404, f"Unknown path {path}")
+        self.fake.count("files.delete")
+        with self.fake.lock:
+            removed = self.fake.files.pop(m.group(1), None)
+        if removed is None:
+            return self._error(403, f"File {m.group(1)} does not exist or you lack permission")
+        self._send(200, {})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.fake.count("requests")
+        body = self._body()
+        if url.path == "/upload/v1beta/files":
+            return self._upload(parse_qs(url.query), body)
+        m = re.fullmatch(r"/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)", url.path)
+        if m:
+            return self._generate(m.group(1), m.group(2) == "streamGenerateContent", body)
+        self._error(404, f"Unknown path {url.path}")
+
+    def _upload(self, query: dict[str, list[str]], body: bytes) -> None:
+        command = self.headers.get("X-Goog-Upload-Command", "")
+        if "start" in command:
+            self.fake.count("files.upload")
+            if self._inject():
+                return
+            session = uuid.uuid4().hex
+            meta = json.loads(body or b"{}").get("file", {})
+            with self.fake.lock:
+                self.fake.sessions[session] = {"meta": meta, "data": bytearray()}
+            return self._send(200, {}, {
+                "X-Goog-Upload-URL": f"{self.base_url}/upload/v1beta/files?upload_id={session}",
+                "X-Goog-Upload-Status": "active",
+            })
+        session = self.fake.sessions.get((query.get("upload_id") or [""])[0])
+        if session is None:
+            return self._error(404, "Unknown upload session")
+        self.fake.transfer(len(body))
+        session["data"] += body
+        if "finalize" not in command:
+            return self._send(200, {}, {"X-Goog-Upload-Status": "active"})
+        with self.fake.lock:
+            self.fake.sessions = {k: v for k, v in self.fake.sessions.items() if v is not session}
+        entry = self.fake.create_file(session["meta"], bytes(session["data"]), self.base_url)
+        self.fake.count("bytes_uploaded", len(session["data"]))
+        self._send(200, {"file": entry}, {"X-Goog-Upload-Status": "final"})
+
+    def _generate(self, model: str, stream: bool, body: bytes) -> None:
+        self.fake.count("models.stream_generate_content" if stream else "models.generate_content")
+        if self._inject():
+            return
+        request = json.loads(body or b"{}")
+        self.fake.transfer(sum(
+            len(part["inlineData"]["data"]) * 3 // 4
+            for content in request.get("contents", [])
+            for part in content.get("parts", []) if "inlineData" in part
+        ))
+        text, usage = self.fake.answer(model, request)
+        if text is None:
+            return self._error(403, f"You do not have permission to access the File {usage} or it may not exist")
+        time.sleep(self.fake.latency + self.jitter)
+        if not stream:
+            return self._send(200, _response(text, usage, model))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        words = re.findall(r"\S+\s*", text)
+        step = max(1, len(words) // 8)
+        for i in range(0, len(words), step):
+            chunk = "".join(words[i:i + step])
+            last = i + step >= len(words)
+            payload = _response(chunk, usage, model, finish=last)
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+            self.wfile.flush()
+            if self.fake.tokens_per_second and not last:
+                time.sleep(step / self.fake.tokens_per_second)
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], fake: FakeGemini, verbose: bool = False):
+        super().__init__(address, Handler)
+        self.fake = fake
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(fake: FakeGemini | None = None, port: int = 0) -> FakeServer:
+    """Serve in a daemon thread (port 0 picks a free one); call .shutdown() to stop."""
+    server = FakeServer(("127.0.0.1", port), fake or FakeGemini())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_failures(specs: list[str]) -> dict[str, float]:
+    failures = {}
+    for spec in specs:
+        kind, _, probability = spec.partition("=")
+        if kind not in ("429", "500", "503", "timeout") or not probability:
+            raise ValueError(f"Invalid --fail {spec!r}; expected 429|500|503|timeout=PROBABILITY")
+        failures[kind] = float(probability)
+    if sum(failures.values()) > 1:
+        raise ValueError("--fail probabilities add up to more than 1")
+    return failures
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Offline Gemini stand-in for look_at.py tests and benchmarks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Then run look_at.py against it:
+  export GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:8765 GOOGLE_API_KEY=fake
+        """
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each generate response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency, up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming pace (default: unthrottled)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Upload throughput in MB/s (default: unthrottled)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (default: unlimited)")
+    parser.add_argument("--fail", action="append", default=[], help="Inject failures, e.g. 429=0.1 or timeout=0.02; repeatable")
+    parser.add_argument("--hang", type=float, default=10.0, help="Seconds an injected timeout holds the connection")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429/503 (default: 1)")
+    parser.add_argument("--drop-fields", type=float, default=0.0, help="Probability of omitting each key of a JSON-schema reply")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for failure and jitter draws")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log every request to stderr")
+    args = parser.parse_args()
+
+    try:
+        fake = FakeGemini(
+            latency=args.latency, jitter=args.jitter,
+            tokens_per_second=args.tokens_per_second, bandwidth=args.bandwidth,
+            rpm=args.rpm, failures=parse_failures(args.fail), hang=args.hang,
+            retry_after=args.retry_after, drop_fields=args.drop_fields, seed=args.seed,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    server = FakeServer(("127.0.0.1", args.port), fake, verbose=args.verbose)
+    print(f"Fake Gemini API on {server.base_url}", file=sys.stderr)
+    print(f"  export GOOGLE_GEMINI_BASE_URL={server.base_url} GOOGLE_API_KEY=fake", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
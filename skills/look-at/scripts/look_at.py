@@ -5,8 +5,20 @@ This script uploads a local file to Google's Gemini API and extracts specific in
 based on the provided goal. It's designed to be used by Claude Code as a tool for analyzing
 files that require interpretation beyond raw text.
 
+Uploads are content-addressed: asking another question about the same file within
+Gemini's 48-hour retention reuses the earlier upload instead of sending the bytes again.
+Answers are cached by (file sha256, goal, model, prompt version), so asking the same
+question twice makes no network call at all. Files up to --inline-max-bytes (default
+4 MB, after preprocessing) skip the Files API and travel inside the generate_content
+request itself: one round trip instead of upload, generate and delete.
+
 Usage:
     python3 look_at.py --file <path> --goal "<what to extract>" [--model <model_name>]
+    python3 look_at.py --file "shots/*.png" --file exhibits/ --goal "..." [--jobs 8]
+    python3 look_at.py --file <path> --field title="..." --field date="..."
+    python3 look_at.py --gc         # forget expired uploads
+    python3 look_at.py --cleanup    # delete every registered upload from Gemini
+    python3 look_at.py --cache-stats
 
 Examples:
     # Extract title from PDF
@@ -18,6 +30,18 @@ Examples:
     # Extract table data
     python3 look_at.py --file data.pdf --goal "Extract the table as JSON"
 
+--map-reduce splits a long PDF into page ranges (--chunk-pages) or a video into time
+segments (--chunk-minutes), answers the goal for each part concurrently and merges the
+notes with a final text-only request. Parts are cached individually.
+
+Several --field NAME=GOAL options are answered together in one request with a JSON
+response schema keyed by NAME; fields missing from the reply are asked for again on
+their own. The file is uploaded and read as model input once.
+
+Several files (repeated --file, globs or directories) are analyzed concurrently with
+one shared client, --jobs at a time. Each result is printed as one JSON line as soon
+as it finishes, followed by a summary on stderr; the exit status is 1 if any failed.
+
 Environment:
     GOOGLE_API_KEY: Required. Your Google API key for Gemini access.
 """
@@ -25,17 +49,91 @@ Environment:
 from __future__ import annotations
 
 import os
+import re
 import sys
+import glob
+import json
+import hashlib
+import time
+import asyncio
 import argparse
+import contextvars
 from pathlib import Path
 
+if __name__ == "__main__":
+    # A running look-at server (server.py) answers without this process
+    # paying for the google-genai import, client setup and TLS handshakes
+    from server import forward
+    status = forward(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
 try:
     from google import genai
+    from google.genai import types
 except ImportError:
     print("Error: google-genai package not installed", file=sys.stderr)
     print("Install with: pip install google-genai", file=sys.stderr)
     sys.exit(1)
 
+from pdf_tools import DEFAULT_LOCAL_MAX_CHARS
+from pdf_tools import format_pages, is_visual_goal, page_count, pages_spec, parse_pages
+from pdf_tools import slice_pdf, text_file, text_layer
+from preprocess import DEFAULT_MAX_SIDE, parse_clip, prepare_media, video_duration
+from rate_limit import DEFAULT_RPM, MAX_ATTEMPTS, PAUSE_CODES, RateLimiter, backoff, error_code, is_retryable
+from response_cache import ResponseCache
+from uploads import UploadRegistry
+import usage
+
+# Files up to this size are sent inline with the request instead of uploaded;
+# Gemini caps a whole request (base64-encoded) at 20 MB
+DEFAULT_INLINE_MAX_BYTES = 4 * 1024 * 1024
+
+# Bump when PROMPT_TEMPLATE changes so cached answers to the old prompt are not reused
+PROMPT_VERSION = 1
+
+PROMPT_TEMPLATE = """Analyze this file and extract the requested information.
+
+Goal: {goal}
+
+Provide ONLY the extracted information that matches the goal.
+Be thorough on what was requested, concise on everything else.
+If the requested information is not found, clearly state what is missing."""
+
+FIELDS_PROMPT_TEMPLATE = """Analyze this file and extract the requested information.
+
+Answer each item below under its name in the JSON response:
+{goals}
+
+For each item, provide ONLY the extracted information that matches it.
+Be thorough on what was requested, concise on everything else.
+If an item is not found in the file, say so in its value."""
+
+MAP_GOAL_TEMPLATE = """{goal}
+
+(This is part {part} of {parts} of a longer {kind}: {span}. Extract everything in this
+part that bears on the goal, citing {unit}, so the parts can be merged later. If this
+part has nothing relevant, say "Nothing relevant".)"""
+
+REDUCE_PROMPT_TEMPLATE = """Below are notes taken separately from {parts} consecutive parts of one {kind},
+each answering the same goal for its own part.
+
+Goal: {goal}
+
+Merge them into one answer to the goal for the whole {kind}. Combine and de-duplicate,
+keep the {unit} the notes cite, and resolve overlaps between parts. Provide ONLY the
+extracted information that matches the goal.
+
+{notes}"""
+
+DEFAULT_CHUNK_PAGES = 20
+DEFAULT_CHUNK_MINUTES = 10.0
+
+# Rounds of re-asking for fields missing from a multi-field reply
+FIELD_RETRIES = 2
+
+FIELD_NAME = re.compile(r"[A-Za-z_][\w-]*")
+
 
 def infer_mime_type(file_path: str) -> str:
     """Infer MIME type from file extension.
@@ -92,11 +190,192 @@ def infer_mime_type(file_path: str) -> str:
     return mime_types.get(ext, "application/octet-stream")
 
 
+def get_api_key() -> str:
+    """Return GOOGLE_API_KEY or raise ValueError."""
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set")
+    return api_key
+
+
+def parse_fields(specs: list[str]) -> dict[str, str]:
+    """Parse repeated NAME=GOAL options into an ordered {name: goal} dict."""
+    fields: dict[str, str] = {}
+    for spec in specs:
+        name, sep, goal = spec.partition("=")
+        name, goal = name.strip(), goal.strip()
+        if not sep or not goal or not FIELD_NAME.fullmatch(name):
+            raise ValueError(f"Invalid --field {spec!r}; expected NAME=GOAL, e.g. title=\"Extract the title\"")
+        if name in fields:
+            raise ValueError(f"Duplicate --field name: {name}")
+        fields[name] = goal
+    return fields
+
+
+def fields_goal(fields: dict[str, str]) -> str:
+    """Single goal string standing for a set of fields (cache key, logs)."""
+    return "; ".join(f"{name}: {goal}" for name, goal in fields.items())
+
+
+def is_missing_file_error(error: Exception) -> bool:
+    """True if Gemini rejected a file reference because the upload is gone."""
+    return getattr(error, "code", None) in (403, 404)
+
+
+# Rate limiter for this run (run_cli sets one for --rpm); None uses LOOK_AT_RPM
+_rate_limiter: contextvars.ContextVar[RateLimiter | None] = contextvars.ContextVar(
+    "look_at_rate_limiter", default=None
+)
+
+# Counters for the current _analyze call: rate limit waits and retries,
+# model requests and their token usage, bytes sent to Gemini
+_tally: contextvars.ContextVar[dict | None] = contextvars.ContextVar("look_at_tally", default=None)
+
+
+def _new_tally() -> dict:
+    tally = {"waited_seconds": 0.0, "retries": 0, "requests": 0,
+             **{field: 0 for field in usage.TOKEN_FIELDS}, "bytes_uploaded": 0}
+    _tally.set(tally)
+    return tally
+
+
+def _count(key: str, amount) -> None:
+    tally = _tally.get()
+    if tally is not None:
+        tally[key] += amount
+
+
+def _count_usage(metadata) -> None:
+    _count("requests", 1)
+    for field, value in usage.tokens(metadata).items():
+        _count(field, value)
+
+
+def _record_usage(model, source, mode, seconds, tally, media, file_path, op="analyze") -> None:
+    """Append this analysis to the usage ledger (see usage.py)."""
+    usage.record(
+        "look-at", model, op=op, source=source, mode=mode, seconds=seconds,
+        **{key: round(value, 3) if isinstance(value, float) else value for key, value in tally.items()},
+        **({"original_bytes": media["original_bytes"], "sent_bytes": media["sent_bytes"]} if media else {}),
+        file=file_path,
+    )
+
+
+async def _limited(call, what: str, verbose: bool = False, label: str | None = None, can_retry=None):
+    """Await call() under the shared rate limit, retrying transient errors.
+
+    Every attempt takes a token from the cross-process bucket first. 429/503
+    pause all look_at processes for the backoff delay (at least Retry-After);
+    other retryable errors just sleep it. can_retry() returning False (e.g.
+    after a stream has started printing) makes the error final.
+    """
+    limiter = _rate_limiter.get() or RateLimiter()
+    for attempt in range(MAX_ATTEMPTS):
+        wait = await asyncio.to_thread(limiter.reserve)
+        if wait > 0:
+            _log(verbose, label, f"Rate limit: waited {wait:.2f}s before {what}")
+            await asyncio.sleep(wait)
+            _count("waited_seconds", wait)
+        try:
+            return await call()
+        except Exception as e:
+            final = attempt == MAX_ATTEMPTS - 1 or (can_retry is not None and not can_retry())
+            if final or not is_retryable(e):
+                raise
+            delay = backoff(attempt, e)
+            _log(
+                verbose, label,
+                f"{error_code(e) or type(e).__name__} on {what}; retrying in {delay:.2f}s "
+                f"(attempt {attempt + 2}/{MAX_ATTEMPTS})",
+            )
+            _count("retries", 1)
+            if error_code(e) in PAUSE_CODES:
+                # The next reserve() waits out the pause, in every process
+                await asyncio.to_thread(limiter.pause, delay)
+            else:
+                await asyncio.sleep(delay)
+                _count("waited_seconds", delay)
+
+
+async def upload_file(client: "genai.Client", file_path: str, mime_type: str,
+                      verbose: bool = False, label: str | None = None):
+    """Upload a local file and return the google.genai File."""
+    return await _limited(
+        lambda: client.aio.files.upload(file=file_path, config={'mime_type': mime_type}),
+        "upload", verbose, label,
+    )
+
+
+# One upload per (key) at a time within a process, so concurrent tasks
+# analyzing identical bytes share a single upload
+_upload_locks: dict[str, asyncio.Lock] = {}
+
+
+async def _call_model(client, model, contents, on_chunk=None, config=None,
+                      verbose=False, label=None) -> tuple[str, float | None]:
+    """Run generate_content, streaming if on_chunk is given.
+
+    Returns:
+        (text, seconds until the first streamed chunk or None when not streaming)
+    """
+    if on_chunk is None:
+        response = await _limited(
+            lambda: client.aio.models.generate_content(model=model, contents=contents, config=config),
+            "generate_content", verbose, label,
+        )
+        _count_usage(response.usage_metadata)
+        return response.text, None
+
+    parts = []
+    metadata = []
+
+    async def stream():
+        start = time.perf_counter()
+        first_token = None
+        async for chunk in await client.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            if chunk.usage_metadata is not None:
+                metadata.append(chunk.usage_metadata)  # the last chunk has the totals
+            text = chunk.text
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(text)
+            on_chunk(text)
+        return first_token
+
+    # Once text has been printed, a retry would print it twice
+    first_token = await _limited(stream, "generate_content", verbose, label, can_retry=lambda: not parts)
+    _count_usage(metadata[-1] if metadata else None)
+    return "".join(parts), first_token
+
+
+def _log(verbose: bool, label: str | None, message: str) -> None:
+    if verbose:
+        prefix = f"[{label}] " if label else ""
+        print(f"{prefix}{message}", file=sys.stderr)
+
+
 def analyze_file(
     file_path: str,
-    goal: str,
+    goal: str | None,
     model: str = "gemini-2.5-flash-lite",
-    verbose: bool = False
+    verbose: bool = False,
+    reuse_uploads: bool = True,
+    use_cache: bool = True,
+    refresh: bool = False,
+    on_chunk=None,
+    pages: str | None = None,
+    local_first: bool = False,
+    local_max_chars: int = DEFAULT_LOCAL_MAX_CHARS,
+    preprocess: bool = True,
+    max_side: int = DEFAULT_MAX_SIDE,
+    clip: str | None = None,
+    frames: int | None = None,
+    inline_max_bytes: int = DEFAULT_INLINE_MAX_BYTES,
+    fields: dict[str, str] | None = None,
 ) -> str:
     """Analyze a file using Gemini API and extract specific information.
 
@@ -105,6 +384,25 @@ def analyze_file(
         goal: Specific information to extract from the file
         model: Gemini model to use (default: gemini-2.5-flash-lite)
         verbose: Whether to print debug information
+        reuse_uploads: Reuse a still-valid upload of identical bytes and keep
+            this upload for later calls; if False, upload and delete afterwards
+        use_cache: Return a cached answer for the same file, goal and model,
+            and cache new answers
+        refresh: Ignore any cached answer but cache the new one
+        on_chunk: Called with each piece of text as it streams in; a cached
+            answer arrives as a single chunk
+        pages: 1-based PDF page spec ("3", "1-5,12"); only those pages are sent
+        local_first: Answer from the PDF's text layer when it has one and the
+            goal isn't visual, without calling Gemini
+        local_max_chars: Longer text layers are sent to Gemini as text instead
+        preprocess: Downscale/re-encode large images and videos before upload
+        max_side: Longest image side after preprocessing, in pixels
+        clip: Video time window to send, e.g. "1:30-2:45"
+        frames: Send a contact sheet of this many video frames instead
+        inline_max_bytes: Send files up to this size inline in the request
+            instead of through the Files API (0 always uploads)
+        fields: {name: goal} to answer in one request instead of goal; the
+            answer is then a JSON object keyed by name (null where not found)
 
     Returns:
         Extracted information as text
@@ -113,76 +411,580 @@ def analyze_file(
         ValueError: If API key is not set or file doesn't exist
         Exception: For API errors
     """
-    # Validate inputs
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set")
+    api_key = get_api_key()
+
+    async def run():
+        client = genai.Client(api_key=api_key)
+        return await _analyze(
+            client, file_path, goal, model, verbose,
+            reuse_uploads=reuse_uploads, use_cache=use_cache, refresh=refresh,
+            on_chunk=on_chunk, pages=pages, local_first=local_first,
+            local_max_chars=local_max_chars, preprocess=preprocess,
+            max_side=max_side, clip=clip, frames=frames,
+            inline_max_bytes=inline_max_bytes, fields=fields,
+        )
+
+    return asyncio.run(run())["answer"]
+
+
+async def _analyze(
+    client: "genai.Client",
+    file_path: str,
+    goal: str | None,
+    model: str,
+    verbose: bool = False,
+    label: str | None = None,
+    reuse_uploads: bool = True,
+    use_cache: bool = True,
+    refresh: bool = False,
+    on_chunk=None,
+    pages: str | None = None,
+    local_first: bool = False,
+    local_max_chars: int = DEFAULT_LOCAL_MAX_CHARS,
+    preprocess: bool = True,
+    max_side: int = DEFAULT_MAX_SIDE,
+    clip: str | None = None,
+    frames: int | None = None,
+    inline_max_bytes: int = DEFAULT_INLINE_MAX_BYTES,
+    fields: dict[str, str] | None = None,
+) -> dict:
+    """Answer one goal about one file; the shared core of single and batch mode.
+
+    Returns:
+        {"answer", "source" ("model"/"cache"/"text-layer"), "cached",
+         "upload" ("inline"/"reused"/"uploaded"/None), "seconds",
+         "first_token_seconds" (streaming only, else None),
+         "preprocess" ({"action", "original_bytes", "sent_bytes"} or None),
+         "waited_seconds", "retries" (rate limiting; model answers only)}
+    """
+    start = time.perf_counter()
+    tally = _new_tally()
+    api_key = get_api_key()
+    if fields:
+        goal = fields_goal(fields)
+    if not goal:
+        raise ValueError("A goal or at least one field is required")
 
+    # Validate inputs
     file_path = os.path.abspath(file_path)
     if not os.path.exists(file_path):
         raise ValueError(f"File not found: {file_path}")
-
-    # Configure client
-    client = genai.Client(api_key=api_key)
+    original_path = file_path  # file_path may become a slice, text layer or preprocessed copy
 
     # Infer MIME type
     mime_type = infer_mime_type(file_path)
 
-    if verbose:
+    if verbose and not label:
         print(f"Analyzing file: {file_path}", file=sys.stderr)
         print(f"MIME type: {mime_type}", file=sys.stderr)
         print(f"Model: {model}", file=sys.stderr)
         print(f"Goal: {goal}", file=sys.stderr)
         print("-" * 50, file=sys.stderr)
 
-    # Upload file to Gemini
-    if verbose:
-        print("Uploading file to Gemini API...", file=sys.stderr)
+    registry = UploadRegistry()
+    sha256 = await asyncio.to_thread(registry.file_sha256, file_path)
 
-    with open(file_path, 'rb') as f:
-        uploaded_file = client.files.upload(file=f, config={'mime_type': mime_type})
+    if pages or local_first:
+        if mime_type != "application/pdf":
+            if pages:
+                raise ValueError(f"--pages only applies to PDFs: {file_path}")
+        else:
+            if local_first and not is_visual_goal(goal):
+                page_texts, usable = await asyncio.to_thread(text_layer, file_path, pages)
+                text = format_pages(page_texts)
+                # Fields need a JSON answer, so their text layer always goes to the model
+                if usable and len(text) <= local_max_chars and not fields:
+                    _log(verbose, label, "Answered from the PDF text layer (no API call)")
+                    if on_chunk is not None:
+                        on_chunk(text)
+                    seconds = round(time.perf_counter() - start, 3)
+                    _record_usage(model, "text-layer", None, seconds, tally, None, original_path)
+                    return {
+                        "answer": text,
+                        "source": "text-layer",
+                        "cached": False,
+                        "upload": None,
+                        "seconds": seconds,
+                        "first_token_seconds": None,
+                    }
+                if usable:
+                    # Long but machine-readable: send the text, not the rendered PDF
+                    _log(verbose, label, f"Sending the text layer ({len(text):,} chars) instead of the PDF")
+                    file_path, mime_type = text_file(sha256, pages, text), "text/plain"
+                    sha256 = await asyncio.to_thread(registry.file_sha256, file_path)
+                else:
+                    _log(verbose, label, "No usable text layer (scanned or image-heavy pages)")
+            if pages and mime_type == "application/pdf":
+                original_size = os.path.getsize(file_path)
+                file_path = await asyncio.to_thread(slice_pdf, file_path, sha256, pages)
+                sha256 = await asyncio.to_thread(registry.file_sha256, file_path)
+                _log(
+                    verbose, label,
+                    f"Sending pages {pages}: {os.path.getsize(file_path):,} of {original_size:,} bytes",
+                )
 
-    if verbose:
-        print(f"File uploaded: {uploaded_file.name}", file=sys.stderr)
+    media = None
+    if preprocess or clip or frames:
+        file_path, mime_type, media = await asyncio.to_thread(
+            prepare_media, file_path, sha256, mime_type, max_side, clip, frames,
+        )
+        if media:
+            sha256 = await asyncio.to_thread(registry.file_sha256, file_path)
+            saved = 1 - media["sent_bytes"] / media["original_bytes"]
+            _log(
+                verbose, label,
+                f"Preprocessed ({media['action']}): {media['original_bytes']:,} -> "
+                f"{media['sent_bytes']:,} bytes ({saved:.0%} saved)",
+            )
 
-    # Construct prompt
-    prompt = f"""Analyze this file and extract the requested information.
+    cache = ResponseCache()
+    cache_key = cache.key(sha256, goal, model, PROMPT_VERSION)
+    if use_cache and not refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cache.record("hit", cached.get("seconds", 0.0))
+            _log(verbose, label, "Cache hit (no API call)")
+            if on_chunk is not None:
+                on_chunk(cached["answer"])
+            seconds = round(time.perf_counter() - start, 3)
+            _record_usage(model, "cache", None, seconds, tally, media, original_path)
+            return {
+                "answer": cached["answer"],
+                "source": "cache",
+                "cached": True,
+                "upload": None,
+                "seconds": seconds,
+                "first_token_seconds": None,
+                "preprocess": media,
+            }
+    cache.record("miss" if use_cache and not refresh else "bypass")
 
-Goal: {goal}
+    if fields:
+        async def ask(file_part):
+            answer = await _ask_fields(client, model, file_part, fields, verbose, label)
+            if on_chunk is not None:
+                on_chunk(answer)
+            return answer, None
+    else:
+        prompt = PROMPT_TEMPLATE.format(goal=goal)
 
-Provide ONLY the extracted information that matches the goal.
-Be thorough on what was requested, concise on everything else.
-If the requested information is not found, clearly state what is missing."""
+        async def ask(file_part):
+            return await _call_model(
+                client, model, [file_part, prompt], on_chunk, verbose=verbose, label=label,
+            )
 
-    if verbose:
-        print("Generating response...", file=sys.stderr)
+    if os.path.getsize(file_path) <= inline_max_bytes:
+        answer, upload, first_token = await _generate_inline(
+            client, file_path, mime_type, ask, verbose, label,
+        )
+    elif reuse_uploads:
+        answer, upload, first_token = await _generate_reusing(
+            client, registry, registry.key(api_key, sha256, mime_type),
+            file_path, mime_type, ask, verbose, label,
+        )
+    else:
+        answer, upload, first_token = await _generate_once(
+            client, file_path, mime_type, ask, verbose, label,
+        )
 
-    try:
-        response = client.models.generate_content(
-            model=model,
-            contents=[uploaded_file, prompt]
+    seconds = round(time.perf_counter() - start, 3)
+    cache.record_latency(upload, seconds)
+    cache.record_waits(tally["waited_seconds"], tally["retries"])
+    _record_usage(model, "model", upload, seconds, tally, media, original_path)
+    complete = not fields or None not in json.loads(answer).values()
+    if use_cache and answer and complete:
+        cache.put(cache_key, answer, model=model, goal=goal, file=file_path, seconds=seconds)
+
+    if verbose and on_chunk is not None and not label and not answer.endswith("\n"):
+        print(file=sys.stderr)  # the streamed answer left the cursor mid-line
+    if first_token is not None:
+        _log(verbose, label, f"Time to first token: {first_token:.2f}s (model), total {seconds:.2f}s ({upload})")
+    else:
+        _log(verbose, label, f"Total time: {seconds:.2f}s ({upload})")
+    if tally["waited_seconds"] or tally["retries"]:
+        _log(verbose, label, f"Rate limiting: {tally['waited_seconds']:.2f}s waited, {tally['retries']} retries")
+    _log(verbose, label, "Analysis complete")
+    if verbose and not label:
+        print("=" * 50, file=sys.stderr)
+    return {
+        "answer": answer,
+        "source": "model",
+        "cached": False,
+        "upload": upload,
+        "seconds": seconds,
+        "first_token_seconds": None if first_token is None else round(first_token, 3),
+        "preprocess": media,
+        "waited_seconds": round(tally["waited_seconds"], 3),
+        "retries": tally["retries"],
+    }
+
+
+async def _ask_fields(client, model, file_part, fields, verbose, label) -> str:
+    """Answer several named goals in one structured request.
+
+    The reply must be a JSON object with a non-empty value per name; names
+    missing from it are asked for again, alone, up to FIELD_RETRIES times.
+    Names still missing after that are returned as null.
+
+    Returns:
+        The answers as a JSON object string, keys in the order of fields
+    """
+    answers: dict[str, str] = {}
+    pending = dict(fields)
+    for attempt in range(1 + FIELD_RETRIES):
+        if attempt:
+            _log(verbose, label, f"Missing {', '.join(pending)}; asking again for those only")
+        prompt = FIELDS_PROMPT_TEMPLATE.format(
+            goals="\n".join(f"- {name}: {goal}" for name, goal in pending.items())
+        )
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=types.Schema(
+                type=types.Type.OBJECT,
+                properties={name: types.Schema(type=types.Type.STRING) for name in pending},
+                required=list(pending),
+            ),
         )
+        text, _ = await _call_model(
+            client, model, [file_part, prompt], config=config, verbose=verbose, label=label,
+        )
+        try:
+            reply = json.loads(text or "")
+        except json.JSONDecodeError:
+            reply = None
+        if isinstance(reply, dict):
+            for name in pending:
+                value = reply.get(name)
+                if value not in (None, "", [], {}):
+                    answers[name] = value
+        pending = {name: goal for name, goal in pending.items() if name not in answers}
+        if not pending:
+            break
+    if pending:
+        _log(verbose, label, f"No answer for {', '.join(pending)} after {FIELD_RETRIES} retries")
+    return json.dumps({name: answers.get(name) for name in fields}, indent=2, ensure_ascii=False)
 
-        # Clean up uploaded file
-        client.files.delete(name=uploaded_file.name)
 
-        if verbose:
-            print("Analysis complete", file=sys.stderr)
-            print("=" * 50, file=sys.stderr)
+async def _generate_inline(client, file_path, mime_type, ask, verbose, label):
+    """Send the bytes inside the generate_content request: a single round trip."""
+    data = await asyncio.to_thread(Path(file_path).read_bytes)
+    _log(verbose, label, f"Sending {len(data):,} bytes inline")
+    _count("bytes_uploaded", len(data))
+    file_part = types.Part.from_bytes(data=data, mime_type=mime_type)
+    text, first_token = await ask(file_part)
+    return text, "inline", first_token
 
-        return response.text
 
-    except Exception as e:
-        # Try to clean up even on error
+async def _generate_once(client, file_path, mime_type, ask, verbose, label):
+    """Upload, generate, delete: the behavior without upload reuse."""
+    _log(verbose, label, "Uploading file to Gemini API...")
+    uploaded_file = await upload_file(client, file_path, mime_type, verbose, label)
+    _count("bytes_uploaded", os.path.getsize(file_path))
+    _log(verbose, label, f"File uploaded: {uploaded_file.name}")
+    _log(verbose, label, "Generating response...")
+    try:
+        text, first_token = await ask(uploaded_file)
+    finally:
+        # Clean up uploaded file, even on error
         try:
-            client.files.delete(name=uploaded_file.name)
-        except:
+            await client.aio.files.delete(name=uploaded_file.name)
+        except Exception:
             pass
-        raise e
+    return text, "uploaded", first_token
 
 
-def main():
-    """Main entry point."""
+async def _generate_reusing(client, registry, key, file_path, mime_type, ask, verbose, label):
+    """Generate against a registered upload of the same bytes, uploading if needed."""
+    for attempt in range(2):
+        async with _upload_locks.setdefault(key, asyncio.Lock()):
+            entry = registry.lookup(key)
+            reused = entry is not None
+            if entry is None:
+                _log(verbose, label, "Uploading file to Gemini API...")
+                uploaded = await upload_file(client, file_path, mime_type, verbose, label)
+                entry = registry.record(key, uploaded, os.path.getsize(file_path))
+                _count("bytes_uploaded", entry["size"])
+                _log(verbose, label, f"File uploaded: {entry['name']}")
+            else:
+                _log(verbose, label, f"Reusing upload: {entry['name']}")
+
+        file_part = types.Part.from_uri(file_uri=entry["uri"], mime_type=entry["mime_type"])
+        _log(verbose, label, "Generating response...")
+        try:
+            text, first_token = await ask(file_part)
+            return text, "reused" if reused else "uploaded", first_token
+        except Exception as e:
+            # The upload was deleted or expired early; upload again once
+            if reused and attempt == 0 and is_missing_file_error(e):
+                registry.forget(key)
+                continue
+            raise
+
+
+def _write_chunk(text: str) -> None:
+    """Print streamed answer text as soon as it arrives."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def expand_files(patterns: list[str]) -> list[str]:
+    """Expand globs and directories into a sorted, de-duplicated file list.
+
+    Globs and directories contribute only files with a known media type;
+    an explicitly named file of unknown type is an error.
+    """
+    def supported(path: Path) -> bool:
+        return infer_mime_type(str(path)) != "application/octet-stream"
+
+    files: dict[str, None] = {}
+    for pattern in patterns:
+        explicit = not glob.has_magic(pattern)
+        for match in [pattern] if explicit else sorted(glob.glob(pattern, recursive=True)):
+            path = Path(match)
+            if path.is_dir():
+                for child in sorted(path.rglob("*")):
+                    if child.is_file() and not child.name.startswith(".") and supported(child):
+                        files[str(child.resolve())] = None
+            elif not path.exists():
+                files[match] = None  # reported as not found by the analysis
+            elif supported(path):
+                files[str(path.resolve())] = None
+            elif explicit:
+                raise ValueError(f"Unsupported file type: {match}")
+    return list(files)
+
+
+async def analyze_many(
+    files: list[str],
+    goal: str | None,
+    model: str = "gemini-2.5-flash-lite",
+    jobs: int = 8,
+    verbose: bool = False,
+    out=None,
+    client: "genai.Client | None" = None,
+    **options,
+) -> list[dict]:
+    """Analyze many files concurrently with one shared client.
+
+    Writes one JSON object per file to out (default stdout) as each finishes:
+    {"file", "ok", "answer" | "error", "cached", "upload", "seconds"}.
+
+    Returns:
+        The result records, in completion order
+    """
+    out = out or sys.stdout
+    client = client or genai.Client(api_key=get_api_key())
+    semaphore = asyncio.Semaphore(jobs)
+    results = []
+
+    async def one(file_path: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            label = os.path.basename(file_path)
+            try:
+                result = await _analyze(client, file_path, goal, model, verbose, label, **options)
+                record = {"file": file_path, "ok": True, **result}
+            except Exception as e:
+                record = {
+                    "file": file_path,
+                    "ok": False,
+                    "error": f"{type(e).__name__}: {e}",
+                    "seconds": round(time.perf_counter() - start, 3),
+                }
+        results.append(record)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    await asyncio.gather(*(one(f) for f in files))
+    return results
+
+
+def _timestamp(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def plan_chunks(
+    file_path: str,
+    pages: str | None = None,
+    clip: str | None = None,
+    chunk_pages: int = DEFAULT_CHUNK_PAGES,
+    chunk_minutes: float = DEFAULT_CHUNK_MINUTES,
+) -> tuple[str, list[dict]]:
+    """Split a PDF into page ranges or a video into time segments.
+
+    Returns:
+        (kind, [{"span": human-readable range, "pages" | "clip": spec,
+                 "offset": start timestamp (videos)}])
+    """
+    mime_type = infer_mime_type(file_path)
+    if mime_type == "application/pdf":
+        indices = parse_pages(pages or "1-", page_count(file_path))
+        groups = [indices[i:i + chunk_pages] for i in range(0, len(indices), chunk_pages)]
+        chunks = [
+            {"span": f"page{'s' if len(g) > 1 else ''} {pages_spec(g)}", "pages": pages_spec(g)}
+            for g in groups
+        ]
+        return "document", chunks
+    if mime_type.startswith("video/"):
+        start, end = parse_clip(clip) if clip else (None, None)
+        start = start or 0.0
+        end = end or video_duration(file_path)
+        step = chunk_minutes * 60
+        chunks = []
+        t = start
+        while t < end - 1:  # don't send a sub-second tail on its own
+            stop = min(t + step, end)
+            chunks.append({
+                "span": f"{_timestamp(t)} to {_timestamp(stop)}",
+                "clip": f"{t:.3f}-{stop:.3f}",
+                "offset": _timestamp(t),
+            })
+            t = stop
+        return "recording", chunks
+    raise ValueError(f"--map-reduce needs a PDF or a video: {file_path}")
+
+
+async def analyze_chunked(
+    client: "genai.Client",
+    file_path: str,
+    goal: str,
+    model: str = "gemini-2.5-flash-lite",
+    verbose: bool = False,
+    jobs: int = 8,
+    chunk_pages: int = DEFAULT_CHUNK_PAGES,
+    chunk_minutes: float = DEFAULT_CHUNK_MINUTES,
+    on_chunk=None,
+    **options,
+) -> dict:
+    """Map-reduce: answer goal per page range or time segment, then merge.
+
+    Chunks run concurrently, --jobs at a time. Each chunk is a derived file
+    (PDF slice or clip) with its own hash, so the answer cache keeps chunk
+    results: a rerun only asks for chunks that failed or whose bytes changed.
+    The merged answer is cached on the chunk answers it was built from.
+
+    Returns:
+        {"answer", "source" ("map-reduce"), "cached" (merge step), "chunks":
+         [{"span", "ok", "cached", "seconds", "waited_seconds", "error"?}],
+         "seconds", "waited_seconds" (rate limiting, all parts and the merge)}
+
+    Raises:
+        RuntimeError: If any chunk failed (the others stay cached)
+    """
+    start = time.perf_counter()
+    file_path = os.path.abspath(file_path)
+    if not os.path.exists(file_path):
+        raise ValueError(f"File not found: {file_path}")
+    pages, clip = options.pop("pages", None), options.pop("clip", None)
+    if options.get("fields") or options.get("frames"):
+        raise ValueError("--map-reduce can't be combined with --field or --frames")
+    options.pop("fields", None)
+    options.pop("frames", None)
+    kind, chunks = await asyncio.to_thread(
+        plan_chunks, file_path, pages, clip, chunk_pages, chunk_minutes,
+    )
+    unit = "page numbers" if kind == "document" else "timestamps"
+    _log(verbose, None, f"Map: {len(chunks)} part(s) of the {kind}, {jobs} at a time")
+
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def one(index: int, chunk: dict) -> dict:
+        cite = unit
+        if "offset" in chunk:
+            cite = f"timestamps in the full recording (add {chunk['offset']}, where this part starts)"
+        map_goal = MAP_GOAL_TEMPLATE.format(
+            goal=goal, part=index + 1, parts=len(chunks), kind=kind, span=chunk["span"], unit=cite,
+        )
+        spec = {key: chunk[key] for key in ("pages", "clip") if key in chunk}
+        async with semaphore:
+            chunk_start = time.perf_counter()
+            try:
+                result = await _analyze(
+                    client, file_path, map_goal, model, verbose,
+                    label=chunk["span"], **spec, **options,
+                )
+            except Exception as e:
+                _log(verbose, chunk["span"], f"Failed: {e}")
+                return {
+                    "span": chunk["span"], "ok": False,
+                    "error": f"{type(e).__name__}: {e}",
+                    "seconds": round(time.perf_counter() - chunk_start, 3),
+                }
+        return {
+            "span": chunk["span"], "ok": True, "cached": result["cached"],
+            "seconds": result["seconds"], "waited_seconds": result.get("waited_seconds", 0.0),
+            "answer": result["answer"],
+        }
+
+    results = await asyncio.gather(*(one(i, c) for i, c in enumerate(chunks)))
+    failed = [r for r in results if not r["ok"]]
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} of {len(chunks)} part(s) failed; rerun to retry only those: "
+            + "; ".join(f"{r['span']}: {r['error']}" for r in failed)
+        )
+    cached_parts = sum(1 for r in results if r["cached"])
+    _log(verbose, None, f"Reduce: merging {len(results)} part(s) ({cached_parts} from cache)")
+
+    notes = "\n\n".join(f"--- {r['span']} ---\n{r.pop('answer').strip()}" for r in results)
+    cache = ResponseCache()
+    use_cache = options.get("use_cache", True)
+    notes_sha = hashlib.sha256(notes.encode()).hexdigest()
+    cache_key = cache.key(notes_sha, f"reduce: {goal}", model, PROMPT_VERSION)
+    cached = cache.get(cache_key) if use_cache and not options.get("refresh") else None
+    reduce_start = time.perf_counter()
+    tally = _new_tally()
+    if cached is not None:
+        answer = cached["answer"]
+        if on_chunk is not None:
+            on_chunk(answer)
+    else:
+        prompt = REDUCE_PROMPT_TEMPLATE.format(
+            parts=len(results), kind=kind, goal=goal, unit=unit, notes=notes,
+        )
+        answer, _ = await _call_model(client, model, [prompt], on_chunk, verbose=verbose)
+        if use_cache and answer:
+            cache.put(cache_key, answer, model=model, goal=goal, file=file_path)
+    _record_usage(
+        model, "cache" if cached is not None else "model", None,
+        round(time.perf_counter() - reduce_start, 3), tally, None, file_path, op="reduce",
+    )
+    return {
+        "answer": answer,
+        "source": "map-reduce",
+        "cached": cached is not None,
+        "chunks": results,
+        "seconds": round(time.perf_counter() - start, 3),
+        "waited_seconds": round(tally["waited_seconds"] + sum(r.get("waited_seconds", 0.0) for r in results), 3),
+    }
+
+
+def cleanup_uploads(verbose: bool = False) -> int:
+    """Delete every upload registered for this API key from Gemini.
+
+    Returns:
+        Number of registry entries removed
+    """
+    api_key = get_api_key()
+    client = genai.Client(api_key=api_key)
+    registry = UploadRegistry()
+    entries = registry.entries(api_key)
+    for key, entry in entries.items():
+        try:
+            client.files.delete(name=entry["name"])
+            if verbose:
+                print(f"Deleted {entry['name']}", file=sys.stderr)
+        except Exception as e:
+            # Already expired or deleted elsewhere; forget it either way
+            if verbose:
+                print(f"Could not delete {entry['name']}: {e}", file=sys.stderr)
+        registry.forget(key)
+    return len(entries)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """The look_at.py command line, shared with server.py."""
     parser = argparse.ArgumentParser(
         description="Analyze media files using Gemini 2.5 Flash Lite",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -191,6 +993,9 @@ Examples:
   %(prog)s --file report.pdf --goal "Extract the title and date"
   %(prog)s --file diagram.png --goal "Describe the architecture"
   %(prog)s --file data.pdf --goal "Extract table as JSON"
+  %(prog)s --file "scans/*.png" --goal "Transcribe the stamp" --jobs 16
+  %(prog)s --file 10k.pdf --field title="Company name" --field fy="Fiscal year end"
+  %(prog)s --gc
 
 Environment:
   GOOGLE_API_KEY    Required. Your Google API key for Gemini access.
@@ -199,16 +1004,23 @@ Environment:
 
     parser.add_argument(
         "--file", "-f",
-        required=True,
-        help="Path to the file to analyze"
+        action="append",
+        help="File to analyze; repeat, or pass a glob or directory, for batch mode"
     )
 
     parser.add_argument(
         "--goal", "-g",
-        required=True,
         help="Specific information to extract from the file"
     )
 
+    parser.add_argument(
+        "--field",
+        action="append",
+        metavar="NAME=GOAL",
+        help="Named goal; repeat to answer several in one request as a JSON object "
+             "keyed by NAME (instead of --goal)"
+    )
+
     parser.add_argument(
         "--model", "-m",
         default="gemini-2.5-flash-lite",
@@ -221,27 +1033,276 @@ Environment:
         help="Print debug information to stderr"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--pages", "-p",
+        help='PDF pages to send, 1-based (e.g. "3", "1-5,12", "40-"); sliced locally'
+    )
+
+    parser.add_argument(
+        "--local-first",
+        action="store_true",
+        help="For PDFs with a text layer, return the extracted text without an API "
+             "call (or send the text instead of the PDF if it is long); scanned "
+             "pages and visual goals still go to Gemini"
+    )
+
+    parser.add_argument(
+        "--local-max-chars",
+        type=int,
+        default=DEFAULT_LOCAL_MAX_CHARS,
+        help=f"Longest text layer returned directly by --local-first (default: {DEFAULT_LOCAL_MAX_CHARS})"
+    )
+
+    parser.add_argument(
+        "--no-preprocess",
+        action="store_true",
+        help="Upload images and videos unchanged"
+    )
+
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=DEFAULT_MAX_SIDE,
+        help=f"Downscale images so the longest side is at most this (default: {DEFAULT_MAX_SIDE})"
+    )
+
+    parser.add_argument(
+        "--clip",
+        help='Video: only send this time window, e.g. "1:30-2:45" or "90-" (needs ffmpeg)'
+    )
+
+    parser.add_argument(
+        "--frames",
+        type=int,
+        help="Video: send one contact sheet of N evenly spaced frames instead (needs ffmpeg)"
+    )
+
+    parser.add_argument(
+        "--map-reduce",
+        action="store_true",
+        help="Long PDF or video: answer the goal per page range or time segment "
+             "concurrently (--jobs at a time), then merge; cached per part"
+    )
+
+    parser.add_argument(
+        "--chunk-pages",
+        type=int,
+        default=DEFAULT_CHUNK_PAGES,
+        help=f"Pages per part with --map-reduce (default: {DEFAULT_CHUNK_PAGES})"
+    )
 
+    parser.add_argument(
+        "--chunk-minutes",
+        type=float,
+        default=DEFAULT_CHUNK_MINUTES,
+        help=f"Minutes of video per part with --map-reduce (default: {DEFAULT_CHUNK_MINUTES:g})"
+    )
+
+    parser.add_argument(
+        "--stream", "-s",
+        action="store_true",
+        help="Print the answer as it is generated (single file); in batch mode, "
+             "record first_token_seconds per file"
+    )
+
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=8,
+        help="Concurrent requests in batch mode (default: 8)"
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Requests per minute shared by all look_at processes; 0 disables pacing "
+             f"(default: $LOOK_AT_RPM or {DEFAULT_RPM})"
+    )
+
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Emit a JSON line even for a single file"
+    )
+
+    parser.add_argument(
+        "--inline-max-bytes",
+        type=int,
+        default=DEFAULT_INLINE_MAX_BYTES,
+        help="Send files up to this size inline in the request instead of uploading "
+             f"them; 0 always uploads (default: {DEFAULT_INLINE_MAX_BYTES})"
+    )
+
+    parser.add_argument(
+        "--no-reuse",
+        action="store_true",
+        help="Upload fresh and delete afterwards instead of reusing uploads"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the answer cache"
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore a cached answer, ask again and cache the new answer"
+    )
+
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print answer cache hit rate, size and latency per upload mode as JSON and exit"
+    )
+
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Delete all cached answers and exit"
+    )
+
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="Forget expired uploads in the local registry and exit"
+    )
+
+    parser.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Delete all registered uploads from Gemini and exit"
+    )
+
+    return parser
+
+
+async def run_cli(args: argparse.Namespace, client: "genai.Client | None" = None) -> int:
+    """Analyze the files named by parsed CLI args and return the exit status.
+
+    Used by main() and by server.py, which passes its long-lived client.
+    """
     try:
-        result = analyze_file(
-            file_path=args.file,
-            goal=args.goal,
-            model=args.model,
-            verbose=args.verbose
+        client = client or genai.Client(api_key=get_api_key())
+        _rate_limiter.set(RateLimiter(args.rpm))
+        options = dict(
+            reuse_uploads=not args.no_reuse,
+            use_cache=not args.no_cache,
+            refresh=args.refresh,
+            pages=args.pages,
+            local_first=args.local_first,
+            local_max_chars=args.local_max_chars,
+            preprocess=not args.no_preprocess,
+            max_side=args.max_side,
+            clip=args.clip,
+            frames=args.frames,
+            inline_max_bytes=args.inline_max_bytes,
+            fields=parse_fields(args.field) if args.field else None,
+        )
+        single = (
+            len(args.file) == 1
+            and not glob.has_magic(args.file[0])
+            and not os.path.isdir(args.file[0])
         )
-        print(result)
+        if args.map_reduce and not single:
+            raise ValueError("--map-reduce takes a single file")
+        if single and (not args.jsonl or args.map_reduce):
+            on_chunk = _write_chunk if args.stream else None
+
+            if args.map_reduce:
+                result = await analyze_chunked(
+                    client, args.file[0], args.goal, args.model, args.verbose,
+                    jobs=args.jobs, chunk_pages=args.chunk_pages,
+                    chunk_minutes=args.chunk_minutes, on_chunk=on_chunk, **options,
+                )
+            else:
+                result = await _analyze(
+                    client, args.file[0], args.goal, args.model, args.verbose,
+                    on_chunk=on_chunk, **options,
+                )
+            answer = result["answer"]
+            if args.jsonl:
+                print(json.dumps({"file": args.file[0], "ok": True, **result}, ensure_ascii=False))
+            elif not args.stream:
+                print(answer)
+            elif not answer.endswith("\n"):
+                print()
+            return 0
+
+        if args.stream:
+            # Measure time to first token per file; output stays one line per file
+            options["on_chunk"] = lambda text: None
+
+        files = expand_files(args.file)
+        if not files:
+            raise ValueError(f"No files match: {' '.join(args.file)}")
+        start = time.perf_counter()
+        results = await analyze_many(
+            files, args.goal, args.model, jobs=args.jobs, verbose=args.verbose,
+            client=client, **options,
+        )
+        failed = [r for r in results if not r["ok"]]
+        cached = sum(1 for r in results if r.get("cached"))
+        print(
+            f"Done in {time.perf_counter() - start:.1f}s: {len(results) - len(failed)} ok "
+            f"({cached} cached), {len(failed)} failed",
+            file=sys.stderr,
+        )
+        for r in failed:
+            print(f"  {r['file']}: {r['error']}", file=sys.stderr)
+        return 1 if failed else 0
 
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+        return 1
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         if args.verbose:
             import traceback
             traceback.print_exc(file=sys.stderr)
-        sys.exit(1)
+        return 1
+
+
+def main():
+    """Main entry point."""
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.cache_stats:
+        print(json.dumps(ResponseCache().stats(), indent=2))
+        return
+
+    if args.clear_cache:
+        removed = ResponseCache().clear()
+        print(f"Removed {removed} cached answer(s)")
+        return
+
+    if args.gc:
+        removed = UploadRegistry().gc()
+        evicted = ResponseCache().evict()
+        print(f"Removed {removed} expired upload(s) from the registry, {evicted} cached answer(s)")
+        return
+
+    if args.cleanup:
+        try:
+            removed = cleanup_uploads(verbose=args.verbose)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Deleted {removed} registered upload(s)")
+        return
+
+    if not (args.file and (args.goal or args.field)):
+        parser.error("--file and --goal (or --field) are required")
+    if args.goal and args.field:
+        parser.error("use either --goal or --field, not both")
+    if args.map_reduce and args.field:
+        parser.error("--map-reduce takes --goal, not --field")
+
+    sys.exit(asyncio.run(run_cli(args)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""Local PDF helpers for look_at.py: page slicing and the text-layer shortcut.
+
+--pages "3" or "1-5,12" uploads only those pages. --local-first reads the
+PDF's own text layer and only involves Gemini when it has to:
+
+    text layer present, goal not visual, text short  -> returned as-is, no API call
+    text layer present, goal not visual, text long   -> the text is sent instead of the PDF
+    scanned pages, image-heavy pages or visual goal  -> the (sliced) PDF is sent
+
+Slices and extracted text are written to $WORKFLOWS_CACHE_DIR/look-at/pdf/
+under names derived from the source hash and page spec, so repeat calls get
+byte-identical files and hit the upload registry and answer cache.
+
+Requires: pypdf (pip install pypdf)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+from pathlib import Path
+
+from uploads import cache_dir
+
+# A page with fewer extractable characters than this is treated as scanned
+MIN_PAGE_CHARS = 200
+
+# Above this many characters the text goes to the model instead of the caller
+DEFAULT_LOCAL_MAX_CHARS = 12_000
+
+# Goals about how a page looks need the rendered page, not its text layer
+VISUAL_GOAL = re.compile(
+    r"\b(chart|graph|plot|figure|diagram|image|photo|picture|logo|signature|"
+    r"handwrit\w*|stamp|layout|colou?r|visual\w*|screenshot|table)s?\b",
+    re.IGNORECASE,
+)
+
+
+def _pypdf():
+    try:
+        import pypdf
+    except ImportError:
+        raise ValueError("--pages, --local-first and --map-reduce need pypdf: pip install pypdf")
+    return pypdf
+
+
+def parse_pages(spec: str, n_pages: int) -> list[int]:
+    """Parse a 1-based page spec ("3", "1-5,12", "10-") into 0-based indices."""
+    pages: list[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        m = re.fullmatch(r"(\d+)?\s*(-)?\s*(\d+)?", part)
+        if not part or not m or not (m.group(1) or m.group(3)):
+            raise ValueError(f"Invalid page spec: {spec!r}")
+        start = int(m.group(1) or 1)
+        end = int(m.group(3) or n_pages) if m.group(2) else start
+        if start < 1 or end > n_pages or start > end:
+            raise ValueError(f"Pages {part} out of range (document has {n_pages})")
+        pages.extend(p - 1 for p in range(start, end + 1) if p - 1 not in pages)
+    return pages
+
+
+def page_count(file_path: str) -> int:
+    return len(_pypdf().PdfReader(file_path).pages)
+
+
+def pages_spec(indices: list[int]) -> str:
+    """Inverse of parse_pages: [0, 1, 2, 9] -> "1-3,10"."""
+    runs: list[list[int]] = []
+    for index in indices:
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return ",".join(f"{a + 1}-{b + 1}" if b > a else f"{a + 1}" for a, b in runs)
+
+
+def _derived_path(source_sha: str, spec: str, suffix: str) -> Path:
+    tag = hashlib.sha256(f"{source_sha}:{spec}".encode()).hexdigest()[:24]
+    return cache_dir() / "pdf" / f"{tag}{suffix}"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def slice_pdf(file_path: str, source_sha: str, spec: str) -> str:
+    """Path of a PDF holding only the pages in spec (cached by source + spec)."""
+    out = _derived_path(source_sha, spec, ".pdf")
+    if out.exists():
+        return str(out)
+    pypdf = _pypdf()
+    reader = pypdf.PdfReader(file_path)
+    writer = pypdf.PdfWriter()
+    for index in parse_pages(spec, len(reader.pages)):
+        writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    _write_atomic(out, buffer.getvalue())
+    return str(out)
+
+
+def text_layer(file_path: str, spec: str | None) -> tuple[list[tuple[int, str]], bool]:
+    """Extract text per selected page.
+
+    Returns:
+        ([(1-based page number, text)], usable) where usable is False if any
+        selected page looks scanned (little text) or is mostly images
+    """
+    pypdf = _pypdf()
+    reader = pypdf.PdfReader(file_path)
+    indices = parse_pages(spec, len(reader.pages)) if spec else range(len(reader.pages))
+    pages = []
+    usable = True
+    for index in indices:
+        page = reader.pages[index]
+        text = (page.extract_text() or "").strip()
+        pages.append((index + 1, text))
+        image_heavy = len(page.images) > 0 and len(text) < 4 * MIN_PAGE_CHARS
+        if len(text) < MIN_PAGE_CHARS or image_heavy:
+            usable = False
+    return pages, usable
+
+
+def format_pages(pages: list[tuple[int, str]]) -> str:
+    return "\n\n".join(f"--- page {number} ---\n{text}" for number, text in pages)
+
+
+def text_file(source_sha: str, spec: str | None, text: str) -> str:
+    """Write extracted text to a stable cache path and return it."""
+    out = _derived_path(source_sha, f"text:{spec}", ".txt")
+    if not out.exists():
+        _write_atomic(out, text.encode())
+    return str(out)
+
+
+def is_visual_goal(goal: str) -> bool:
+    return bool(VISUAL_GOAL.search(goal))
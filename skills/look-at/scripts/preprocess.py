@@ -0,0 +1,213 @@
+"""Shrink images and videos before look_at.py uploads them.
+
+Gemini tiles images at 768px and samples video at about one frame per
+second, so a 40 MP phone photo or a 4K screen recording mostly costs
+upload time. Before upload:
+
+    images  larger than --max-side (default 2048px) or 1 MB are EXIF-rotated,
+            downscaled and re-encoded (JPEG for photos, optimized PNG otherwise)
+    videos  --clip 1:30-2:45 trims to a window; --frames N sends one contact
+            sheet of N evenly spaced frames; videos over 20 MB are re-encoded
+            at up to 720p
+
+A result is only used if it is smaller than the original. Outputs are
+written to $WORKFLOWS_CACHE_DIR/look-at/media/ under names derived from the
+source hash and settings, so repeats hit the upload registry and answer cache.
+
+Requires: Pillow for images, ffmpeg/ffprobe on PATH for video. Without
+them, files are sent unchanged (--clip/--frames raise an error).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any
+
+from uploads import cache_dir
+
+DEFAULT_MAX_SIDE = 2048
+IMAGE_REENCODE_BYTES = 1024 * 1024
+JPEG_QUALITY = 85
+VIDEO_MAX_HEIGHT = 720
+VIDEO_REENCODE_BYTES = 20 * 1024 * 1024
+PHOTO_TYPES = {"image/jpeg", "image/heic", "image/heif"}
+
+
+def _derived_path(source_sha: str, settings: str, suffix: str) -> Path:
+    tag = hashlib.sha256(f"{source_sha}:{settings}".encode()).hexdigest()[:24]
+    return cache_dir() / "media" / f"{tag}{suffix}"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds from "95", "1:35" or "0:01:35.5"."""
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_clip(spec: str) -> tuple[float | None, float | None]:
+    """Parse START-END (either side optional) into seconds."""
+    m = re.fullmatch(r"\s*([\d:.]*)\s*-\s*([\d:.]*)\s*", spec)
+    if not m or not (m.group(1) or m.group(2)):
+        raise ValueError(f"Invalid clip {spec!r}; expected START-END such as 1:30-2:45")
+    start = parse_timestamp(m.group(1)) if m.group(1) else None
+    end = parse_timestamp(m.group(2)) if m.group(2) else None
+    if start is not None and end is not None and end <= start:
+        raise ValueError(f"Clip end must be after start: {spec!r}")
+    return start, end
+
+
+def prepare_media(
+    file_path: str,
+    source_sha: str,
+    mime_type: str,
+    max_side: int = DEFAULT_MAX_SIDE,
+    clip: str | None = None,
+    frames: int | None = None,
+) -> tuple[str, str, dict[str, Any] | None]:
+    """Return (path, mime_type, info) to send in place of file_path.
+
+    info is None when the original is sent, otherwise
+    {"action", "original_bytes", "sent_bytes"}.
+    """
+    if mime_type.startswith("image/"):
+        result = _prepare_image(file_path, source_sha, mime_type, max_side)
+    elif mime_type.startswith("video/"):
+        result = _prepare_video(file_path, source_sha, clip, frames)
+    else:
+        if clip or frames:
+            raise ValueError(f"--clip/--frames only apply to videos: {file_path}")
+        result = None
+    if result is None:
+        return file_path, mime_type, None
+    path, new_mime, action = result
+    info = {
+        "action": action,
+        "original_bytes": os.path.getsize(file_path),
+        "sent_bytes": os.path.getsize(path),
+    }
+    return path, new_mime, info
+
+
+def _prepare_image(file_path, source_sha, mime_type, max_side):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    try:
+        img = Image.open(file_path)
+    except Exception:
+        # HEIC without pillow-heif, or a format Pillow can't read
+        return None
+    if getattr(img, "is_animated", False):
+        return None
+
+    size = os.path.getsize(file_path)
+    width, height = img.size
+    if max(width, height) <= max_side and size <= IMAGE_REENCODE_BYTES:
+        return None
+
+    photo = mime_type in PHOTO_TYPES
+    suffix, new_mime = (".jpg", "image/jpeg") if photo else (".png", "image/png")
+    out = _derived_path(source_sha, f"image:{max_side}", suffix)
+    if not out.exists():
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if photo:
+            img.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        else:
+            img.save(buffer, "PNG", optimize=True)
+        if buffer.tell() >= size:
+            return None
+        _write_atomic(out, buffer.getvalue())
+
+    with Image.open(out) as small:
+        new_size = small.size
+    action = f"{width}x{height} -> {new_size[0]}x{new_size[1]} {suffix[1:]}"
+    return str(out), new_mime, action
+
+
+def video_duration(file_path: str) -> float:
+    """Length of a video in seconds (needs ffprobe)."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", file_path],
+        capture_output=True, text=True,
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        raise ValueError(f"Could not read video duration: {result.stderr.strip() or file_path}")
+
+
+def _run_ffmpeg(args: list[str], out: Path) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.stem}.tmp{out.suffix}")
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", *args, str(tmp)], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        raise ValueError(f"ffmpeg failed: {result.stderr.strip()}")
+    tmp.replace(out)
+
+
+def _prepare_video(file_path, source_sha, clip, frames):
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        if clip or frames:
+            raise ValueError("--clip/--frames need ffmpeg and ffprobe on PATH")
+        return None
+
+    start, end = parse_clip(clip) if clip else (None, None)
+    window = []
+    if start is not None:
+        window += ["-ss", f"{start:.3f}"]
+    if end is not None:
+        window += ["-to", f"{end:.3f}"]
+    label = f"clip {clip}" if clip else ""
+
+    if frames:
+        out = _derived_path(source_sha, f"frames:{frames}:{clip}", ".jpg")
+        if not out.exists():
+            duration = (end or video_duration(file_path)) - (start or 0.0)
+            cols = math.ceil(math.sqrt(frames))
+            rows = math.ceil(frames / cols)
+            _run_ffmpeg(
+                [*window, "-i", file_path,
+                 "-vf", f"fps={frames / max(duration, 0.001):.6f},scale=480:-2,tile={cols}x{rows}",
+                 "-frames:v", "1", "-q:v", "3"],
+                out,
+            )
+        action = ", ".join(filter(None, [label, f"{frames}-frame contact sheet"]))
+        return str(out), "image/jpeg", action
+
+    if not clip and os.path.getsize(file_path) <= VIDEO_REENCODE_BYTES:
+        return None
+    out = _derived_path(source_sha, f"video:{VIDEO_MAX_HEIGHT}:{clip}", ".mp4")
+    if not out.exists():
+        _run_ffmpeg(
+            [*window, "-i", file_path,
+             "-vf", f"scale=-2:'min({VIDEO_MAX_HEIGHT},ih)'",
+             "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+             "-c:a", "aac", "-ac", "1", "-b:a", "64k", "-movflags", "+faststart"],
+            out,
+        )
+    if not clip and os.path.getsize(out) >= os.path.getsize(file_path):
+        return None
+    action = ", ".join(filter(None, [label, f"re-encoded <= {VIDEO_MAX_HEIGHT}p"]))
+    return str(out), "video/mp4", action
@@ -0,0 +1,134 @@
+"""Request pacing shared by every look_at process, plus retry with backoff.
+
+Parallel subagents run separate look_at.py processes against one API quota.
+They coordinate through one small state file: each Gemini call takes a
+token from a bucket refilled at --rpm per minute (up to BURST) under an
+exclusive flock, waiting when the bucket is empty. A 429 or 503 pauses
+every process until its Retry-After has passed, and the failed call is
+retried with exponential backoff and full jitter.
+
+State: $WORKFLOWS_CACHE_DIR/look-at/ratelimit.json
+Env:   LOOK_AT_RPM sets the default rate (0 disables pacing, not retries)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from uploads import cache_dir
+
+DEFAULT_RPM = 120
+BURST = 10
+
+# Same status codes google-genai's own retry options treat as transient
+RETRY_CODES = {408, 429, 500, 502, 503, 504}
+
+# Codes that mean the quota is exhausted, so every process should hold off
+PAUSE_CODES = {429, 503}
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+
+class RateLimiter:
+    """Token bucket whose state lives in a flock'd JSON file."""
+
+    def __init__(self, rpm: float | None = None, burst: int = BURST, path: Path | None = None):
+        if rpm is None:
+            rpm = float(os.environ.get("LOOK_AT_RPM", DEFAULT_RPM))
+        self.rpm = rpm
+        self.burst = burst
+        self.path = path or cache_dir() / "ratelimit.json"
+
+    @contextmanager
+    def _state(self) -> Iterator[dict[str, Any]]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = json.loads(self.path.read_text())
+            except (OSError, json.JSONDecodeError):
+                state = {}
+            yield state
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(state))
+            tmp.replace(self.path)
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it.
+
+        Tokens may go negative: each caller reserves its place in line and
+        sleeps outside the lock, so waiting processes don't hold the file.
+        """
+        now = time.time()
+        with self._state() as state:
+            wait = max(0.0, state.get("paused_until", 0.0) - now)
+            if self.rpm > 0:
+                rate = self.rpm / 60
+                elapsed = max(0.0, now - state.get("updated", now))
+                tokens = min(float(self.burst), state.get("tokens", float(self.burst)) + elapsed * rate)
+                tokens -= 1
+                state["tokens"] = tokens
+                state["updated"] = now
+                wait = max(wait, -tokens / rate)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold off every process for seconds (after a 429/503)."""
+        with self._state() as state:
+            state["paused_until"] = max(state.get("paused_until", 0.0), time.time() + seconds)
+
+
+def error_code(error: Exception) -> int | None:
+    return getattr(error, "code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    if error_code(error) in RETRY_CODES:
+        return True
+    # Dropped connections and timeouts from the HTTP layer (httpx)
+    return type(error).__name__ in {
+        "ConnectTimeout", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+        "ConnectError", "ReadError", "RemoteProtocolError",
+    }
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds the server asked us to wait, from Retry-After or RetryInfo."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # Gemini puts {"@type": ".../google.rpc.RetryInfo", "retryDelay": "17s"} in error.details
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            delay = isinstance(detail, dict) and detail.get("retryDelay")
+            if delay:
+                m = re.fullmatch(r"([\d.]+)s", str(delay))
+                if m:
+                    return float(m.group(1))
+    return None
+
+
+def backoff(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential delay, but never shorter than Retry-After."""
+    delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+    hinted = retry_after(error)
+    return max(delay, hinted) if hinted is not None else delay
@@ -0,0 +1,206 @@
+"""On-disk cache of look_at.py answers.
+
+An answer is keyed by (file sha256, normalized goal, model, prompt version),
+so re-asking the same question about the same bytes - typically after a
+context compaction - returns instantly with no network call. Entries live
+for a TTL and the cache is bounded in size; least recently used entries
+are evicted first.
+
+Layout: $WORKFLOWS_CACHE_DIR/look-at/responses/<key[:2]>/<key>.json
+        $WORKFLOWS_CACHE_DIR/look-at/responses/stats.json  (hit/miss counters,
+                                                           latency per upload mode,
+                                                           rate limit waits,
+                                                           tracked size)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from uploads import cache_dir
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Expired entries are swept at most this often unless the cache is over size
+EVICT_INTERVAL = 3600
+# A size sweep trims to this share of max_bytes, so the next few puts don't sweep again
+LOW_WATER = 0.9
+
+
+def normalize_goal(goal: str) -> str:
+    """Goals differing only in case or whitespace share an answer."""
+    return re.sub(r"\s+", " ", goal).strip().casefold()
+
+
+class ResponseCache:
+    """TTL- and size-bounded answer cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.root = root or cache_dir() / "responses"
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def key(self, sha256: str, goal: str, model: str, prompt_version: int) -> str:
+        payload = json.dumps([sha256, normalize_goal(goal), model, prompt_version])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """The cached entry for key, or None if absent or past its TTL."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        # mtime doubles as last access time for LRU eviction
+        os.utime(path)
+        return entry
+
+    def put(self, key: str, answer: str, **meta: Any) -> None:
+        """Store an answer; sweep the cache only when it is over size or due.
+
+        The running size lives in stats.json, so a write costs O(1) file
+        operations rather than a scan of every entry.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"answer": answer, "created": time.time(), **meta})
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(data)
+        tmp.replace(path)
+        with self._update_stats() as stats:
+            stats["tracked_bytes"] = stats.get("tracked_bytes", 0) + len(data.encode()) - replaced
+            due = (stats["tracked_bytes"] > self.max_bytes
+                   or time.time() - stats.get("evicted_at", 0) > EVICT_INTERVAL)
+        if due:
+            self.evict()
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.root.glob("??/*.json"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue  # evicted or cleared by another process
+        return entries
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones over max_bytes.
+
+        Uses only stat(): mtime is the last access and never precedes
+        creation, so an entry untouched for a TTL is expired. One used
+        recently but created earlier is caught by get().
+        """
+        now = time.time()
+        removed = 0
+        live = []
+        for path, st in self._entries():
+            if now - st.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                live.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in live)
+        target = self.max_bytes * LOW_WATER if total > self.max_bytes else self.max_bytes
+        for _, size, path in sorted(live):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._update_stats() as stats:
+            stats["tracked_bytes"] = total
+            stats["evicted_at"] = now
+        return removed
+
+    def clear(self) -> int:
+        entries = self._entries()
+        for path, _ in entries:
+            path.unlink(missing_ok=True)
+        with self._update_stats() as stats:
+            stats["tracked_bytes"] = 0
+        return len(entries)
+
+    # -- stats -------------------------------------------------------------
+
+    @contextmanager
+    def _update_stats(self) -> Iterator[dict[str, Any]]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / "stats.json"
+        with open(self.root / "stats.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stats = json.loads(path.read_text())
+            except (OSError, json.JSONDecodeError):
+                stats = {}
+            yield stats
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stats))
+            tmp.replace(path)
+
+    def record(self, event: str, seconds: float = 0.0) -> None:
+        """Count a hit, miss or bypass; hits also add the seconds they saved."""
+        with self._update_stats() as stats:
+            stats[event] = stats.get(event, 0) + 1
+            if event == "hit":
+                stats["seconds_saved"] = round(stats.get("seconds_saved", 0.0) + seconds, 3)
+
+    def record_latency(self, mode: str, seconds: float) -> None:
+        """Add one model call's wall time under its mode (inline/uploaded/reused)."""
+        with self._update_stats() as stats:
+            calls, total = stats.setdefault("latency", {}).get(mode, [0, 0.0])
+            stats["latency"][mode] = [calls + 1, round(total + seconds, 3)]
+
+    def record_waits(self, seconds: float, retries: int) -> None:
+        """Add time one analysis spent waiting on the rate limiter and retries."""
+        if not seconds and not retries:
+            return
+        with self._update_stats() as stats:
+            waits = stats.setdefault("rate_limit", {"delayed": 0, "seconds": 0.0, "retries": 0})
+            waits["delayed"] += 1
+            waits["seconds"] = round(waits["seconds"] + seconds, 3)
+            waits["retries"] += retries
+
+    def stats(self) -> dict[str, Any]:
+        try:
+            stats = json.loads((self.root / "stats.json").read_text())
+        except (OSError, json.JSONDecodeError):
+            stats = {}
+        entries = self._entries()
+        hits, misses = stats.get("hit", 0), stats.get("miss", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "bypassed": stats.get("bypass", 0),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "seconds_saved": stats.get("seconds_saved", 0.0),
+            "entries": len(entries),
+            "bytes": sum(st.st_size for _, st in entries),
+            "latency_by_mode": {
+                mode: {"calls": calls, "avg_seconds": round(total / calls, 3)}
+                for mode, (calls, total) in sorted(stats.get("latency", {}).items())
+            },
+            "rate_limit": stats.get("rate_limit", {"delayed": 0, "seconds": 0.0, "retries": 0}),
+        }
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""Warm look-at server: google-genai imported once, one client kept connected.
+
+Every look_at.py run otherwise pays for importing google-genai, building a
+genai.Client and opening new TLS connections, which for a small screenshot
+often takes longer than the model does. While this server runs, look_at.py
+sends its arguments over a Unix socket and only prints what comes back;
+when it isn't running, look_at.py works exactly as before.
+
+Usage:
+    python3 server.py start [--idle-minutes 30]   # run in the background
+    python3 server.py serve [--idle-minutes 30]   # run in the foreground
+    python3 server.py status                      # cold start cost vs warm latency
+    python3 server.py stop
+
+Socket: $WORKFLOWS_CACHE_DIR/look-at/server.sock (log: server.log)
+
+--gc, --cleanup, --cache-stats, --clear-cache and --help always run locally,
+as does any call whose GOOGLE_API_KEY differs from the server's. Set
+LOOK_AT_SERVER=0 to bypass a running server.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import contextvars
+from typing import Any, Callable, Iterator
+
+from uploads import account_id, cache_dir
+
+DEFAULT_IDLE_MINUTES = 30
+
+# Flags that never go to the server: they are cheap or act on local state
+LOCAL_ONLY = {"--gc", "--cleanup", "--cache-stats", "--clear-cache", "--help", "-h"}
+
+CONNECT_TIMEOUT = 2.0
+
+
+def socket_path():
+    return cache_dir() / "server.sock"
+
+
+def _connect(message: dict[str, Any], timeout: float | None) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path()))
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(message) + "\n").encode())
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _replies(sock: socket.socket) -> Iterator[dict[str, Any]]:
+    with sock, sock.makefile("r", encoding="utf-8") as lines:
+        for line in lines:
+            yield json.loads(line)
+
+
+def _ask(command: str) -> dict[str, Any] | None:
+    """Send a control command; None if no server is listening."""
+    try:
+        return next(_replies(_connect({"command": command}, timeout=5.0)), None)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+# -- client ------------------------------------------------------------------
+
+
+def forward(argv: list[str]) -> int | None:
+    """Run a look_at.py invocation on the server.
+
+    Returns:
+        The exit status, or None if the call should run locally (no server,
+        a local-only flag, or a different API key)
+    """
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if (os.environ.get("LOOK_AT_SERVER") == "0" or not api_key
+            or LOCAL_ONLY.intersection(argv) or not socket_path().exists()):
+        return None
+    start = time.perf_counter()
+    message = {"command": "run", "argv": argv, "cwd": os.getcwd(), "account": account_id(api_key)}
+    try:
+        sock = _connect(message, timeout=None)
+    except OSError:
+        return None  # stale socket left by a server that died
+    for reply in _replies(sock):
+        if "fallback" in reply:
+            return None
+        if "stdout" in reply:
+            sys.stdout.write(reply["stdout"])
+            sys.stdout.flush()
+        elif "stderr" in reply:
+            sys.stderr.write(reply["stderr"])
+        elif "exit" in reply:
+            if reply.get("verbose"):
+                print(
+                    f"look-at server: {time.perf_counter() - start:.2f}s warm; "
+                    f"a cold start adds about {reply['cold_start_seconds']:.2f}s",
+                    file=sys.stderr,
+                )
+            return reply["exit"]
+    print("Error: look-at server closed the connection", file=sys.stderr)
+    return 1
+
+
+# -- server ------------------------------------------------------------------
+
+# Where print() output goes for the request running in the current task
+_sink: contextvars.ContextVar[Callable[[dict], None] | None] = contextvars.ContextVar(
+    "look_at_sink", default=None
+)
+
+
+class _Routed:
+    """sys.stdout/sys.stderr replacement that sends writes to the current client."""
+
+    def __init__(self, name: str, fallback):
+        self.name = name
+        self.fallback = fallback
+
+    def write(self, text: str) -> int:
+        send = _sink.get()
+        if send is None:
+            return self.fallback.write(text)
+        send({self.name: text})
+        return len(text)
+
+    def flush(self) -> None:
+        if _sink.get() is None:
+            self.fallback.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+class LookAtServer:
+    """Runs look_at.run_cli for each connection with one shared client."""
+
+    def __init__(self, idle_minutes: float = DEFAULT_IDLE_MINUTES):
+        self.idle_seconds = idle_minutes * 60
+        self.started = time.time()
+        self.last_used = time.monotonic()
+        self.active = 0
+        self.requests = 0
+        self.busy_seconds = 0.0
+        self.last_seconds = None
+        self.stopping = asyncio.Event()
+
+    async def warm_up(self) -> None:
+        t0 = time.perf_counter()
+        import look_at  # imports google-genai
+
+        t1 = time.perf_counter()
+        self.look_at = look_at
+        self.parser = look_at.build_parser()
+        self.api_key = look_at.get_api_key()
+        self.client = look_at.genai.Client(api_key=self.api_key)
+        try:
+            # Open the connection pool now instead of on the first request
+            await self.client.aio.models.get(model=self.parser.get_default("model"))
+        except Exception:
+            pass
+        t2 = time.perf_counter()
+        self.cold_start = {
+            "import_seconds": round(t1 - t0, 3),
+            "client_seconds": round(t2 - t1, 3),
+            "seconds": round(t2 - t0, 3),
+        }
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started),
+            "active": self.active - 1,  # not counting this status request
+            "cold_start": self.cold_start,
+            "warm": {
+                "requests": self.requests,
+                "avg_seconds": round(self.busy_seconds / self.requests, 3) if self.requests else None,
+                "last_seconds": self.last_seconds,
+            },
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.active += 1
+
+        def reply(obj: dict) -> None:
+            if not writer.is_closing():
+                writer.write((json.dumps(obj) + "\n").encode())
+
+        try:
+            message = json.loads(await reader.readline())
+            command = message.get("command")
+            if command == "status":
+                reply(self.status())
+            elif command == "stop":
+                reply({"stopping": True, "pid": os.getpid()})
+                self.stopping.set()
+            elif command == "run":
+                await self.run(message, reply)
+            await writer.drain()
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            self.active -= 1
+            self.last_used = time.monotonic()
+            writer.close()
+
+    async def run(self, message: dict[str, Any], reply: Callable[[dict], None]) -> None:
+        if message.get("account") != account_id(self.api_key):
+            reply({"fallback": "different GOOGLE_API_KEY"})
+            return
+        _sink.set(lambda obj: None)  # argparse complaints are repeated locally
+        try:
+            args = self.parser.parse_args(message["argv"])
+        except SystemExit:
+            reply({"fallback": "invalid arguments"})
+            return
+        if (args.gc or args.cleanup or args.cache_stats or args.clear_cache
+                or not (args.file and (args.goal or args.field)) or (args.goal and args.field)):
+            reply({"fallback": "local-only command"})
+            return
+        # Relative paths and globs are relative to the caller's directory
+        args.file = [os.path.join(message["cwd"], f) for f in args.file]
+
+        _sink.set(reply)
+        start = time.perf_counter()
+        try:
+            status = await self.look_at.run_cli(args, self.client)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            status = 1
+        seconds = time.perf_counter() - start
+        self.requests += 1
+        self.busy_seconds += seconds
+        self.last_seconds = round(seconds, 3)
+        reply({
+            "exit": status,
+            "seconds": self.last_seconds,
+            "cold_start_seconds": self.cold_start["seconds"],
+            "verbose": args.verbose,
+        })
+
+    async def serve(self) -> None:
+        await self.warm_up()
+        path = socket_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self.handle, path=str(path))
+        os.chmod(path, 0o600)
+        sys.stdout = _Routed("stdout", sys.stdout)
+        sys.stderr = _Routed("stderr", sys.stderr)
+        print(
+            f"look-at server {os.getpid()} listening on {path} "
+            f"(cold start {self.cold_start['seconds']:.2f}s)",
+            flush=True,
+        )
+        async with server:
+            while not self.stopping.is_set():
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    idle = time.monotonic() - self.last_used
+                    if self.active == 0 and idle > self.idle_seconds:
+                        print(f"Idle for {idle / 60:.0f} minutes, exiting", flush=True)
+                        break
+        path.unlink(missing_ok=True)
+
+
+def start_background(idle_minutes: float) -> int:
+    """Start `serve` detached and wait until it answers; returns an exit status."""
+    status = _ask("status")
+    if status is not None:
+        print(f"look-at server already running (pid {status['pid']})")
+        return 0
+    log_path = cache_dir() / "server.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--idle-minutes", str(idle_minutes)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True,
+        )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            print(f"Error: look-at server exited during startup; see {log_path}", file=sys.stderr)
+            return 1
+        status = _ask("status")
+        if status is not None:
+            print(
+                f"look-at server started (pid {status['pid']}); "
+                f"cold start {status['cold_start']['seconds']:.2f}s is now paid once"
+            )
+            return 0
+        time.sleep(0.1)
+    print(f"Error: look-at server did not start within 60s; see {log_path}", file=sys.stderr)
+    return 1
+
+
+def main(argv: list[str] | None = None):
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Keep a warm look-at server running on a Unix socket",
+    )
+    parser.add_argument("command", choices=["start", "serve", "status", "stop"])
+    parser.add_argument(
+        "--idle-minutes",
+        type=float,
+        default=DEFAULT_IDLE_MINUTES,
+        help=f"Exit after this long without requests (default: {DEFAULT_IDLE_MINUTES})"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        sys.exit(start_background(args.idle_minutes))
+
+    if args.command == "serve":
+        try:
+            asyncio.run(LookAtServer(args.idle_minutes).serve())
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    reply = _ask(args.command)
+    if reply is None:
+        print("look-at server is not running")
+        sys.exit(1 if args.command == "status" else 0)
+    if args.command == "status":
+        print(json.dumps(reply, indent=2))
+    else:
+        print(f"Stopping look-at server (pid {reply['pid']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Content-addressed registry of Gemini file uploads for look_at.py.
+
+Gemini keeps an uploaded file for 48 hours. The registry maps the sha256 of
+a local file (per API key and MIME type) to the uploaded file's name, URI
+and expiry, so asking several questions about the same bytes uploads them
+once. Entries close to expiry are never handed out; expired entries are
+pruned by gc().
+
+Registry: $WORKFLOWS_CACHE_DIR/look-at/uploads.json
+          (default: ~/.cache/workflows/look-at/uploads.json)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+REGISTRY_VERSION = 1
+
+# Gemini deletes uploads after 48h; assume slightly less if the API
+# response carries no expiration_time
+DEFAULT_LIFETIME = 47 * 3600
+
+# Don't reuse an upload that may expire before generate_content finishes
+EXPIRY_MARGIN = 15 * 60
+
+
+def cache_dir() -> Path:
+    override = os.environ.get("WORKFLOWS_CACHE_DIR")
+    if override:
+        return Path(override) / "look-at"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "workflows" / "look-at"
+
+
+def account_id(api_key: str) -> str:
+    """Short fingerprint of an API key; uploads are only visible to their key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadRegistry:
+    """sha256 -> uploaded Gemini file, shared by every look_at process.
+
+    Reads are lock-free; every change is a read-modify-write of the JSON
+    file under an exclusive flock, so concurrent processes don't lose
+    each other's entries.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or cache_dir() / "uploads.json"
+        self.data = self._read()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != REGISTRY_VERSION:
+            data = {"version": REGISTRY_VERSION, "uploads": {}, "hashes": {}}
+        return data
+
+    @contextmanager
+    def _update(self) -> Iterator[dict[str, Any]]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.data = self._read()
+            yield self.data
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self.data))
+            tmp.replace(self.path)
+
+    # -- hashing -----------------------------------------------------------
+
+    def file_sha256(self, file_path: str) -> str:
+        """sha256 of a file, remembered by (size, mtime) to skip re-reading."""
+        st = os.stat(file_path)
+        sig = [st.st_size, st.st_mtime_ns]
+        known = self.data["hashes"].get(file_path)
+        if known and known[:2] == sig:
+            return known[2]
+        sha = _sha256(file_path)
+        with self._update() as data:
+            data["hashes"][file_path] = sig + [sha]
+        return sha
+
+    def key(self, api_key: str, sha256: str, mime_type: str) -> str:
+        return f"{account_id(api_key)}:{sha256}:{mime_type}"
+
+    # -- uploads -----------------------------------------------------------
+
+    def lookup(self, key: str) -> dict[str, Any] | None:
+        """The registered upload for key, if it outlives EXPIRY_MARGIN."""
+        entry = self.data["uploads"].get(key)
+        if entry is None:
+            # Another process (or task) may have uploaded it since we loaded
+            self.data = self._read()
+            entry = self.data["uploads"].get(key)
+        if entry and entry["expires_at"] - EXPIRY_MARGIN > time.time():
+            return entry
+        return None
+
+    def record(self, key: str, uploaded: Any, size: int) -> dict[str, Any]:
+        """Remember a freshly uploaded google.genai File under key."""
+        expires = getattr(uploaded, "expiration_time", None)
+        entry = {
+            "name": uploaded.name,
+            "uri": uploaded.uri,
+            "mime_type": uploaded.mime_type,
+            "size": size,
+            "uploaded_at": time.time(),
+            "expires_at": expires.timestamp() if expires else time.time() + DEFAULT_LIFETIME,
+        }
+        with self._update() as data:
+            data["uploads"][key] = entry
+        return entry
+
+    def forget(self, key: str) -> None:
+        with self._update() as data:
+            data["uploads"].pop(key, None)
+
+    def entries(self, api_key: str | None = None) -> dict[str, dict[str, Any]]:
+        """Registered uploads, optionally only those belonging to api_key."""
+        prefix = f"{account_id(api_key)}:" if api_key else ""
+        return {k: v for k, v in self.data["uploads"].items() if k.startswith(prefix)}
+
+    def gc(self) -> int:
+        """Drop expired uploads and hashes of files that no longer exist."""
+        now = time.time()
+        with self._update() as data:
+            expired = [k for k, v in data["uploads"].items() if v["expires_at"] <= now]
+            for key in expired:
+                del data["uploads"][key]
+            for path in [p for p in data["hashes"] if not os.path.exists(p)]:
+                del data["hashes"][path]
+        return len(expired)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Usage ledger for Gemini calls: tokens, latency and bytes per call, plus a report.
+
+look_at.py appends one JSON line per analysis (cache hits included, with zero
+tokens) and gemini-batch's batch_processor.py one per batch response and
+upload, so the report can show where time and spend go and what the answer
+cache and preprocessing save.
+
+Both skills write through record() and tokens() here (batch_processor.py
+imports this module), so there is one path and one schema. Record fields
+(absent ones count as 0):
+    ts, skill, model, op ("analyze"/"reduce"/"batch"/"batch-job"/"upload"), source
+    ("model"/"cache"/"text-layer"), mode (look-at upload mode), requests,
+    prompt_tokens, candidates_tokens, cached_tokens, thoughts_tokens,
+    seconds, waited_seconds, bytes_uploaded (inline or uploaded; 0 when an
+    upload was reused), original_bytes/sent_bytes (before/after preprocessing),
+    file, request_id/job/shards (gemini-batch)
+
+Usage:
+    python3 usage.py report [--by day,skill,model] [--since 2026-10-01] [--skill look-at] [--json]
+    python3 usage.py path
+
+Ledger: $WORKFLOWS_CACHE_DIR/usage.jsonl (~/.cache/workflows/usage.jsonl);
+        WORKFLOWS_USAGE_LEDGER overrides the path, WORKFLOWS_USAGE_LEDGER=0 turns it off
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+from uploads import cache_dir
+
+TOKEN_FIELDS = ("prompt_tokens", "candidates_tokens", "cached_tokens", "thoughts_tokens")
+
+# USD per million tokens (input, output) at list prices; cached input tokens
+# bill at CACHED_DISCOUNT of input, Batch API calls at BATCH_DISCOUNT of both.
+# Unknown models report no cost rather than a guess.
+PRICES = {
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+CACHED_DISCOUNT = 0.25
+BATCH_DISCOUNT = 0.5
+
+GROUPS = ("day", "skill", "model", "op", "source", "mode")
+
+
+def ledger_path() -> Path | None:
+    """Where records go, or None when the ledger is turned off."""
+    override = os.environ.get("WORKFLOWS_USAGE_LEDGER")
+    if override == "0":
+        return None
+    if override:
+        return Path(override)
+    return cache_dir().parent / "usage.jsonl"
+
+
+def tokens(metadata: Any) -> dict[str, int]:
+    """Token counts from a usage_metadata object or a batch output usageMetadata dict."""
+    if metadata is None:
+        return {}
+    names = {
+        "prompt_tokens": ("prompt_token_count", "promptTokenCount"),
+        "candidates_tokens": ("candidates_token_count", "candidatesTokenCount"),
+        "cached_tokens": ("cached_content_token_count", "cachedContentTokenCount"),
+        "thoughts_tokens": ("thoughts_token_count", "thoughtsTokenCount"),
+    }
+    counts = {}
+    for field, (snake, camel) in names.items():
+        if isinstance(metadata, dict):
+            value = metadata.get(camel, metadata.get(snake))
+        else:
+            value = getattr(metadata, snake, None)
+        counts[field] = value or 0
+    return counts
+
+
+def record(skill: str, model: str, **fields: Any) -> None:
+    """Append one usage record; never raises, so accounting can't fail a call."""
+    path = ledger_path()
+    if path is None:
+        return
+    entry = {"ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+             "skill": skill, "model": model, **fields}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write() of a short line on an O_APPEND file: concurrent
+        # processes don't interleave records
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+def read_records(path: Path) -> Iterator[dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+    except FileNotFoundError:
+        return
+
+
+def estimate_cost(entry: dict[str, Any]) -> float | None:
+    prices = PRICES.get(entry.get("model", "").removeprefix("models/"))
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    cached = entry.get("cached_tokens", 0)
+    cost = (
+        (entry.get("prompt_tokens", 0) - cached) * input_price
+        + cached * input_price * CACHED_DISCOUNT
+        + (entry.get("candidates_tokens", 0) + entry.get("thoughts_tokens", 0)) * output_price
+    ) / 1e6
+    return cost * BATCH_DISCOUNT if entry.get("op") == "batch" else cost
+
+
+def summarize(records: Iterable[dict[str, Any]], by: list[str]) -> list[dict[str, Any]]:
+    """Totals per group: calls, tokens, cost, latency, bytes and cache/preprocess savings."""
+    groups: dict[tuple, dict[str, Any]] = {}
+    for entry in records:
+        entry.setdefault("day", entry.get("ts", "")[:10])
+        key = tuple(entry.get(field) or "-" for field in by)
+        row = groups.setdefault(key, {
+            **dict(zip(by, key)), "calls": 0, "requests": 0, "cache_hits": 0,
+            **{field: 0 for field in TOKEN_FIELDS},
+            "cost_usd": 0.0, "unpriced_calls": 0, "seconds": 0.0, "waited_seconds": 0.0,
+            "bytes_uploaded": 0, "bytes_saved_by_preprocess": 0,
+        })
+        row["calls"] += 1
+        row["requests"] += entry.get("requests", 0)
+        row["cache_hits"] += entry.get("source") == "cache"
+        for field in TOKEN_FIELDS:
+            row[field] += entry.get(field, 0)
+        cost = estimate_cost(entry)
+        if cost is None:
+            row["unpriced_calls"] += 1
+        else:
+            row["cost_usd"] += cost
+        row["seconds"] += entry.get("seconds", 0.0)
+        row["waited_seconds"] += entry.get("waited_seconds", 0.0)
+        row["bytes_uploaded"] += entry.get("bytes_uploaded", 0)
+        if entry.get("original_bytes"):
+            row["bytes_saved_by_preprocess"] += entry["original_bytes"] - entry.get("sent_bytes", 0)
+    rows = []
+    for key in sorted(groups):
+        row = groups[key]
+        row["avg_seconds"] = round(row["seconds"] / row["calls"], 3)
+        for field in ("seconds", "waited_seconds"):
+            row[field] = round(row[field], 3)
+        row["cost_usd"] = round(row["cost_usd"], 6)
+        rows.append(row)
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Report Gemini usage recorded by the skills")
+    parser.add_argument("command", choices=["report", "path"])
+    parser.add_argument(
+        "--by",
+        default="day,skill,model",
+        help=f"Comma-separated grouping from {', '.join(GROUPS)} (default: day,skill,model)"
+    )
+    parser.add_argument("--since", help="Only records on or after this day (YYYY-MM-DD)")
+    parser.add_argument("--skill", help="Only records from this skill (look-at, gemini-batch)")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+
+    path = ledger_path()
+    if args.command == "path":
+        print(path if path is not None else "usage ledger is off (WORKFLOWS_USAGE_LEDGER=0)")
+        return
+    if path is None:
+        print("Error: usage ledger is off (WORKFLOWS_USAGE_LEDGER=0)", file=sys.stderr)
+        sys.exit(1)
+
+    by = [field.strip() for field in args.by.split(",") if field.strip()]
+    unknown = set(by) - set(GROUPS)
+    if unknown:
+        print(f"Error: cannot group by {', '.join(sorted(unknown))}", file=sys.stderr)
+        sys.exit(1)
+    records = (
+        r for r in read_records(path)
+        if (not args.since or r.get("ts", "")[:10] >= args.since)
+        and (not args.skill or r.get("skill") == args.skill)
+    )
+    rows = summarize(records, by)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No usage recorded in {path}")
+        return
+    columns = by + ["calls", "cache_hits", "prompt_tokens", "candidates_tokens", "cached_tokens",
+                    "cost_usd", "avg_seconds", "waited_seconds", "bytes_uploaded"]
+    cells = [[f"{row[c]:.4f}" if c == "cost_usd" else str(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(line[i]) for line in cells)) for i, c in enumerate(columns)]
+    print("  ".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(f"{cell:>{w}}" for cell, w in zip(line, widths)))
+    unpriced = sum(row["unpriced_calls"] for row in rows)
+    if unpriced:
+        print(f"({unpriced} call(s) on models without a list price are not in cost_usd)")
+
+
+if __name__ == "__main__":
+    main()
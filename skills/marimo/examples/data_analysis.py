@@ -88,16 +88,27 @@ def _(mo, summary):
 
 
 @app.cell
-def _(enhanced, mo, pl):
-    """Time series visualization using altair (if available)."""
+def _():
+    """Downsampling helpers: copy scripts/downsample.py next to this notebook."""
+    from downsample import domain_from, lttb, window
+
+    return domain_from, lttb, window
+
+
+@app.cell
+def _(enhanced, lttb, mo):
+    """Time series visualization using altair (if available).
+
+    Charts embed every row, so reduce to ~2,000 points per category in
+    Polars first; brushing an x range re-samples that range below.
+    """
+    series = enhanced.select(["date", "value", "category"]).sort("date")
     try:
         import altair as alt
 
-        # Prepare data for plotting
-        plot_data = enhanced.select(["date", "value", "category"]).to_pandas()
-
-        chart = (
-            alt.Chart(plot_data)
+        brush = alt.selection_interval(encodings=["x"])
+        chart = mo.ui.altair_chart(
+            alt.Chart(lttb(series, "date", "value", group="category").to_pandas())
             .mark_line()
             .encode(
                 x="date:T",
@@ -105,11 +116,29 @@ def _(enhanced, mo, pl):
                 color="category:N",
             )
             .properties(width=600, height=300)
+            .add_params(brush)
         )
-
-        mo.ui.altair_chart(chart)
     except ImportError:
-        mo.md("*Install altair for visualization: `pip install altair`*")
+        alt, chart = None, mo.md("*Install altair for visualization: `pip install altair`*")
+
+    chart
+    return alt, chart, series
+
+
+@app.cell
+def _(alt, chart, domain_from, lttb, series, window):
+    """Zoomed view: re-query the full data for the brushed range."""
+    domain = domain_from(chart.value, "date") if alt else None
+    zoomed = None
+    if domain:
+        detail = lttb(window(series, "date", domain), "date", "value", group="category")
+        zoomed = (
+            alt.Chart(detail.to_pandas())
+            .mark_line()
+            .encode(x="date:T", y="value:Q", color="category:N")
+            .properties(width=600, height=200, title=f"{domain[0]} – {domain[1]}")
+        )
+    zoomed
 
 
 if __name__ == "__main__":
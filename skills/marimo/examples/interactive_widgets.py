@@ -74,7 +74,12 @@ def _(pl):
 
 @app.cell
 def _(category, df, pl, search, threshold):
-    """Filter data based on widget values."""
+    """Filter data based on widget values.
+
+    This re-scans df on every widget change, which is fine at this size.
+    For millions of rows, see "Filtering Large DataFrames" in
+    references/widgets.md (scripts/indexed_filter.py).
+    """
     filtered = df
 
     # Apply threshold filter
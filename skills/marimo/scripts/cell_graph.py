@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""Index the reactive cell graph of every marimo notebook in a project.
+
+Usage:
+    python cell_graph.py index [ROOT]                  # refresh the cache
+    python cell_graph.py where df [ROOT]               # cells that define df
+    python cell_graph.py uses df [ROOT]                # cells that read df
+    python cell_graph.py downstream notebook.py df     # cells that recompute if df's cell changes
+    python cell_graph.py downstream notebook.py 42     # ... for the cell containing line 42
+    python cell_graph.py graph notebook.py [--json]    # full DAG for one notebook
+
+Without executing anything, each notebook is parsed into cells with:
+    - defs: global names the cell binds (marimo's "definitions")
+    - refs: global names the cell reads but does not bind ("references")
+    - parents/children: edges of the reactive DAG (def -> ref)
+    - downstream: transitive closure of children (what re-runs on edit)
+
+Names starting with an underscore are cell-private in marimo and are
+excluded from defs. Results are cached per notebook by content hash, so
+queries over hundreds of notebooks only re-parse files that changed.
+
+Cache: $WORKFLOWS_CACHE_DIR/marimo-graph/index.json
+(default ~/.cache/workflows/marimo-graph/index.json)
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import builtins
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+# Bump when the cell analysis changes so cached notebooks are re-parsed
+CACHE_VERSION = 1
+
+BUILTINS = frozenset(dir(builtins))
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__", "__marimo__", ".pixi"}
+CELL_DECORATORS = {"cell", "function", "class_definition"}
+
+
+def cache_path() -> Path:
+    override = os.environ.get("WORKFLOWS_CACHE_DIR")
+    if override:
+        return Path(override) / "marimo-graph" / "index.json"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "workflows" / "marimo-graph" / "index.json"
+
+
+def _target_names(target: ast.AST) -> list[str]:
+    """Names bound by an assignment target (handles tuples and starred)."""
+    if isinstance(target, ast.Name):
+        return [target.id]
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [n for elt in target.elts for n in _target_names(elt)]
+    if isinstance(target, ast.Starred):
+        return _target_names(target.value)
+    return []
+
+
+def _global_bindings(body: list[ast.stmt]) -> list[str]:
+    """Names bound at cell scope, including inside if/for/with/try blocks."""
+    names: list[str] = []
+    for stmt in body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(stmt.name)
+        elif isinstance(stmt, ast.Assign):
+            for target in stmt.targets:
+                names.extend(_target_names(target))
+        elif isinstance(stmt, (ast.AnnAssign, ast.AugAssign)):
+            names.extend(_target_names(stmt.target))
+        elif isinstance(stmt, (ast.Import, ast.ImportFrom)):
+            for alias in stmt.names:
+                if alias.name != "*":
+                    names.append(alias.asname or alias.name.split(".")[0])
+        elif isinstance(stmt, (ast.For, ast.AsyncFor)):
+            names.extend(_target_names(stmt.target))
+        elif isinstance(stmt, (ast.With, ast.AsyncWith)):
+            for item in stmt.items:
+                if item.optional_vars is not None:
+                    names.extend(_target_names(item.optional_vars))
+        if isinstance(stmt, ast.Try):
+            for handler in stmt.handlers:
+                if handler.name:
+                    names.append(handler.name)
+        for field in ("body", "orelse", "finalbody"):
+            names.extend(_global_bindings(getattr(stmt, field, []) or []))
+        for handler in getattr(stmt, "handlers", []) or []:
+            names.extend(_global_bindings(handler.body))
+        # Walrus assignments bind in the enclosing (cell) scope
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.NamedExpr):
+                names.extend(_target_names(node.target))
+    return names
+
+
+def _free_names(nodes: list[ast.AST], bound: set[str]) -> set[str]:
+    """Names loaded in nodes that are not bound anywhere inside them."""
+    loaded: set[str] = set()
+    local = set(bound)
+    for root in nodes:
+        for node in ast.walk(root):
+            if isinstance(node, ast.Name):
+                if isinstance(node.ctx, ast.Load):
+                    loaded.add(node.id)
+                else:
+                    local.add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                local.add(node.name)
+            elif isinstance(node, ast.arg):
+                local.add(node.arg)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    local.add(alias.asname or alias.name.split(".")[0])
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                local.add(node.name)
+    return loaded - local - BUILTINS
+
+
+def _cell_kind(node: ast.AST) -> str | None:
+    for decorator in getattr(node, "decorator_list", []):
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr in CELL_DECORATORS:
+            return target.attr
+    return None
+
+
+def analyze_notebook(source: str) -> list[dict[str, Any]]:
+    """Parse marimo notebook source into cells with defs, refs and edges."""
+    tree = ast.parse(source)
+    cells: list[dict[str, Any]] = []
+
+    for node in tree.body:
+        # `with app.setup:` defines names visible to every cell
+        if isinstance(node, ast.With) and any(
+            isinstance(item.context_expr, ast.Attribute)
+            and item.context_expr.attr == "setup"
+            for item in node.items
+        ):
+            defs = _global_bindings(node.body)
+            refs = _free_names(node.body, set(defs))
+            cells.append(_cell("setup", "setup", node, defs, refs))
+            continue
+
+        kind = _cell_kind(node)
+        if kind is None:
+            continue
+        if kind == "cell":
+            params = [arg.arg for arg in node.args.args]
+            defs = _global_bindings(node.body)
+            refs = _free_names(node.body, set(defs)) | set(params)
+            # marimo also treats names in the return tuple as definitions
+            for stmt in node.body:
+                if isinstance(stmt, ast.Return) and stmt.value is not None:
+                    defs.extend(_target_names(stmt.value))
+        else:
+            defs = [node.name]
+            refs = _free_names([node], {node.name})
+        cells.append(_cell(node.name, kind, node, defs, refs))
+
+    definers: dict[str, list[int]] = {}
+    for i, cell in enumerate(cells):
+        for name in cell["defs"]:
+            definers.setdefault(name, []).append(i)
+
+    for i, cell in enumerate(cells):
+        # Only names some other cell defines are edges; the rest are
+        # builtins, attributes of imports, or undefined (marimo check's job)
+        cell["refs"] = sorted(r for r in cell["refs"] if r in definers)
+        parents = {p for name in cell["refs"] for p in definers[name] if p != i}
+        cell["parents"] = sorted(parents)
+        cell["children"] = []
+    for i, cell in enumerate(cells):
+        for p in cell["parents"]:
+            cells[p]["children"].append(i)
+    for cell in cells:
+        cell["children"].sort()
+    return cells
+
+
+def _cell(name: str, kind: str, node: ast.AST, defs: list[str], refs: set[str]) -> dict:
+    public = sorted({d for d in defs if not d.startswith("_")})
+    return {
+        "name": name,
+        "kind": kind,
+        "lineno": node.lineno,
+        "end_lineno": node.end_lineno,
+        "defs": public,
+        "refs": set(refs) - set(public),
+    }
+
+
+def downstream(cells: list[dict[str, Any]], start: int) -> list[int]:
+    """Indices of every cell that re-runs when cell `start` runs (excluding it)."""
+    seen: set[int] = set()
+    stack = list(cells[start]["children"])
+    while stack:
+        i = stack.pop()
+        if i in seen or i == start:
+            continue
+        seen.add(i)
+        stack.extend(cells[i]["children"])
+    return sorted(seen)
+
+
+def is_marimo_notebook(data: bytes) -> bool:
+    return b"marimo.App" in data and b"@app." in data
+
+
+def discover_notebooks(root: Path) -> list[Path]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                found.append(Path(dirpath) / filename)
+    return sorted(found)
+
+
+class NotebookIndex:
+    """Per-notebook cell graphs cached by stat signature and content hash."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.entries = data["notebooks"]
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "notebooks": self.entries}))
+        tmp.replace(self.path)
+        self._dirty = False
+
+    def get(self, notebook: Path) -> dict[str, Any] | None:
+        """Return the cached entry for notebook, re-parsing only if it changed.
+
+        Entries are {"sig", "sha256", "cells", "error"}; non-marimo files are
+        cached with cells=None so they are not re-read either.
+        """
+        key = str(notebook.resolve())
+        st = notebook.stat()
+        sig = [st.st_size, st.st_mtime_ns]
+        entry = self.entries.get(key)
+        if entry is not None and entry["sig"] == sig:
+            return entry
+
+        data = notebook.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            entry["sig"] = sig
+            self._dirty = True
+            return entry
+
+        entry = {"sig": sig, "sha256": digest, "cells": None, "error": None}
+        if is_marimo_notebook(data):
+            try:
+                entry["cells"] = analyze_notebook(data.decode("utf-8", errors="replace"))
+            except SyntaxError as e:
+                entry["error"] = f"SyntaxError: {e}"
+        self.entries[key] = entry
+        self._dirty = True
+        return entry
+
+    def refresh(self, root: Path) -> dict[str, dict[str, Any]]:
+        """Bring every notebook under root up to date; return {path: entry}."""
+        root = root.resolve()
+        notebooks = {}
+        for path in discover_notebooks(root):
+            entry = self.get(path)
+            if entry["cells"] is not None or entry["error"]:
+                notebooks[str(path)] = entry
+        # Forget files under root that no longer exist
+        prefix = str(root) + os.sep
+        for key in [k for k in self.entries if k.startswith(prefix)]:
+            if not Path(key).exists():
+                del self.entries[key]
+                self._dirty = True
+        return notebooks
+
+
+def resolve_cell(cells: list[dict[str, Any]], selector: str) -> int | None:
+    """Find a cell by line number, function name, or a name it defines."""
+    if selector.isdigit():
+        line = int(selector)
+        for i, cell in enumerate(cells):
+            if cell["lineno"] <= line <= cell["end_lineno"]:
+                return i
+        return None
+    for i, cell in enumerate(cells):
+        if selector in cell["defs"]:
+            return i
+    for i, cell in enumerate(cells):
+        if cell["name"] == selector and selector != "_":
+            return i
+    return None
+
+
+def describe(cell: dict[str, Any]) -> str:
+    label = cell["name"] if cell["name"] != "_" else "cell"
+    defs = ", ".join(cell["defs"]) or "-"
+    return f"{label} (line {cell['lineno']}) defs: {defs}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cached reactive cell graph for marimo notebooks."
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Cache file (default: {cache_path()})",
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="Output results as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_index = sub.add_parser("index", parents=[common], help="Parse changed notebooks under ROOT")
+    p_index.add_argument("root", nargs="?", default=".", type=Path)
+
+    for name, help_text in (("where", "Cells that define NAME"), ("uses", "Cells that read NAME")):
+        p = sub.add_parser(name, parents=[common], help=help_text)
+        p.add_argument("name")
+        p.add_argument("root", nargs="?", default=".", type=Path)
+
+    p_down = sub.add_parser("downstream", parents=[common], help="Cells that recompute when a cell changes")
+    p_down.add_argument("notebook", type=Path)
+    p_down.add_argument("cell", help="Line number, cell function name, or a name the cell defines")
+
+    p_graph = sub.add_parser("graph", parents=[common], help="Full cell graph for one notebook")
+    p_graph.add_argument("notebook", type=Path)
+
+    args = parser.parse_args()
+    index = NotebookIndex(args.cache or cache_path())
+
+    if args.command in ("index", "where", "uses"):
+        if not args.root.is_dir():
+            print(f"Error: Directory not found: {args.root}", file=sys.stderr)
+            sys.exit(1)
+        notebooks = index.refresh(args.root)
+        index.save()
+
+        if args.command == "index":
+            n_cells = sum(len(e["cells"] or []) for e in notebooks.values())
+            errors = {p: e["error"] for p, e in notebooks.items() if e["error"]}
+            if args.json:
+                print(json.dumps({"notebooks": len(notebooks), "cells": n_cells, "errors": errors}, indent=2))
+            else:
+                print(f"Indexed {len(notebooks)} notebooks, {n_cells} cells")
+                for path, error in sorted(errors.items()):
+                    print(f"  {path}: {error}")
+            return
+
+        field = "defs" if args.command == "where" else "refs"
+        hits = [
+            {"notebook": path, "cell": i, "lineno": cell["lineno"], "defs": cell["defs"]}
+            for path, entry in sorted(notebooks.items())
+            for i, cell in enumerate(entry["cells"] or [])
+            if args.name in cell[field]
+        ]
+        if args.json:
+            print(json.dumps(hits, indent=2))
+        elif not hits:
+            print(f"No cells {'define' if field == 'defs' else 'read'} {args.name}")
+        else:
+            for hit in hits:
+                print(f"{hit['notebook']}:{hit['lineno']}  defs: {', '.join(hit['defs']) or '-'}")
+        return
+
+    if not args.notebook.exists():
+        print(f"Error: File not found: {args.notebook}", file=sys.stderr)
+        sys.exit(1)
+    entry = index.get(args.notebook)
+    index.save()
+    if entry["error"]:
+        print(f"Error: {entry['error']}", file=sys.stderr)
+        sys.exit(1)
+    if entry["cells"] is None:
+        print(f"Error: Not a marimo notebook: {args.notebook}", file=sys.stderr)
+        sys.exit(1)
+    cells = entry["cells"]
+
+    if args.command == "graph":
+        if args.json:
+            print(json.dumps(cells, indent=2))
+            return
+        print(f"{len(cells)} cells:\n")
+        for i, cell in enumerate(cells):
+            print(f"  [{i}] {describe(cell)}")
+            print(f"      refs: {', '.join(cell['refs']) or '-'}")
+            print(f"      downstream: {downstream(cells, i) or '-'}")
+        return
+
+    start = resolve_cell(cells, args.cell)
+    if start is None:
+        print(f"Error: No cell matches {args.cell!r}", file=sys.stderr)
+        sys.exit(1)
+    affected = downstream(cells, start)
+    if args.json:
+        print(json.dumps({
+            "cell": {"index": start, **cells[start]},
+            "downstream": [{"index": i, **cells[i]} for i in affected],
+        }, indent=2))
+        return
+    print(f"Editing [{start}] {describe(cells[start])}")
+    print(f"re-runs {len(affected)} cell(s):")
+    for i in affected:
+        print(f"  [{i}] {describe(cells[i])}")
+
+
+if __name__ == "__main__":
+    main()
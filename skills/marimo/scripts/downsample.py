@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Aggregate and downsample in Polars before handing data to a chart.
+
+Altair embeds every row in the chart spec (and refuses more than 5,000 by
+default); Plotly ships them all to the browser. Reduce first, render second:
+
+    lttb(df, "date", "value", n_out=2000, group="category")   # time series
+    bin_xy(df, "x", "y", bins=200)                            # scatter -> heatmap
+    hexbin(df, "x", "y", gridsize=80)                         # scatter -> hexbin
+    top_k(df, "category", k=20, value="sales")                # bar charts
+
+Zooming re-queries the full data at the same point budget, so detail
+appears as the view narrows:
+
+    @app.cell
+    def _(alt, lttb, mo, series):
+        brush = alt.selection_interval(encodings=["x"])
+        chart = mo.ui.altair_chart(
+            alt.Chart(lttb(series, "date", "value").to_pandas())
+            .mark_line().encode(x="date:T", y="value:Q").add_params(brush)
+        )
+        return (chart,)
+
+    @app.cell
+    def _(chart, domain_from, lttb, series, window):
+        # Brush a region of the overview to re-sample just that range
+        detail = lttb(window(series, "date", domain_from(chart.value, "date")), "date", "value")
+        return (detail,)
+
+window() uses binary search on a column sorted once up front, so each
+zoom costs O(log n) plus the downsample of the visible slice.
+
+Benchmark on synthetic data:
+    python downsample.py --rows 5000000
+
+Requires: polars, numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+DEFAULT_POINTS = 2000
+
+
+def _as_float(s: pl.Series) -> np.ndarray:
+    """Numeric view of a column; dates and datetimes use their physical value."""
+    if s.dtype.is_temporal():
+        s = s.to_physical()
+    return s.cast(pl.Float64).to_numpy()
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of the points to keep."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Bucket i spans [edges[i], edges[i + 1]); first and last points are fixed
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the last kept point, each candidate,
+        # and the next bucket's centroid
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(
+    df: pl.DataFrame,
+    x: str,
+    y: str,
+    n_out: int = DEFAULT_POINTS,
+    group: str | None = None,
+) -> pl.DataFrame:
+    """Downsample a line series to n_out points per group, keeping its shape.
+
+    Rows with a null x or y are dropped; rows are sorted by x if needed.
+    """
+    df = df.drop_nulls([x, y])
+    parts = df.partition_by(group, maintain_order=True) if group else [df]
+    out = []
+    for part in parts:
+        if not part[x].is_sorted():
+            part = part.sort(x)
+        keep = _lttb_indices(_as_float(part[x]), _as_float(part[y]), n_out)
+        out.append(part[keep] if len(keep) < part.height else part)
+    return pl.concat(out) if out else df
+
+
+def _extent(df: pl.DataFrame, col: str, extent: tuple[Any, Any] | None) -> tuple[float, float]:
+    lo, hi = extent if extent is not None else (df[col].min(), df[col].max())
+    if lo is None:
+        return 0.0, 1.0
+    lo, hi = float(lo), float(hi)
+    return (lo, hi) if hi > lo else (lo - 0.5, hi + 0.5)
+
+
+def bin_xy(
+    df: pl.DataFrame,
+    x: str,
+    y: str,
+    bins: int | tuple[int, int] = 200,
+    extent: tuple[tuple[Any, Any], tuple[Any, Any]] | None = None,
+) -> pl.DataFrame:
+    """Count points on a rectangular grid (at most bins_x * bins_y rows).
+
+    Returns {x}, {x}_end, {y}, {y}_end, count for each non-empty cell;
+    render with mark_rect and x/x2, y/y2 encodings.
+    """
+    nx, ny = (bins, bins) if isinstance(bins, int) else bins
+    (x0, x1), (y0, y1) = (
+        _extent(df, x, extent and extent[0]),
+        _extent(df, y, extent and extent[1]),
+    )
+    wx, wy = (x1 - x0) / nx, (y1 - y0) / ny
+    bx = ((pl.col(x) - x0) / wx).floor().clip(0, nx - 1).cast(pl.Int32).alias("_bx")
+    by = ((pl.col(y) - y0) / wy).floor().clip(0, ny - 1).cast(pl.Int32).alias("_by")
+    return (
+        df.lazy()
+        .filter(pl.col(x).is_between(x0, x1) & pl.col(y).is_between(y0, y1))
+        .group_by(bx, by)
+        .agg(pl.len().alias("count"))
+        .select(
+            (x0 + pl.col("_bx") * wx).alias(x),
+            (x0 + (pl.col("_bx") + 1) * wx).alias(f"{x}_end"),
+            (y0 + pl.col("_by") * wy).alias(y),
+            (y0 + (pl.col("_by") + 1) * wy).alias(f"{y}_end"),
+            "count",
+        )
+        .sort(x, y)
+        .collect()
+    )
+
+
+def hexbin(
+    df: pl.DataFrame,
+    x: str,
+    y: str,
+    gridsize: int = 80,
+    extent: tuple[tuple[Any, Any], tuple[Any, Any]] | None = None,
+) -> pl.DataFrame:
+    """Count points per hexagon (matplotlib's hexbin grid).
+
+    Returns hexagon centers {x}, {y} and count for each non-empty cell.
+    """
+    (x0, x1), (y0, y1) = (
+        _extent(df, x, extent and extent[0]),
+        _extent(df, y, extent and extent[1]),
+    )
+    nx = gridsize
+    ny = max(1, int(nx / math.sqrt(3)))
+    sx, sy = (x1 - x0) / nx, (y1 - y0) / ny
+    u = (pl.col(x) - x0) / sx
+    v = (pl.col(y) - y0) / sy
+    # Two offset rectangular lattices; each point belongs to the nearer center
+    d1 = (u - u.round()) ** 2 + 3 * (v - v.round()) ** 2
+    d2 = (u - u.floor() - 0.5) ** 2 + 3 * (v - v.floor() - 0.5) ** 2
+    first = d1 < d2
+    return (
+        df.lazy()
+        .filter(pl.col(x).is_between(x0, x1) & pl.col(y).is_between(y0, y1))
+        .select(
+            pl.when(first).then(u.round()).otherwise(u.floor() + 0.5).alias("_cx"),
+            pl.when(first).then(v.round()).otherwise(v.floor() + 0.5).alias("_cy"),
+        )
+        .group_by("_cx", "_cy")
+        .agg(pl.len().alias("count"))
+        .select(
+            (x0 + pl.col("_cx") * sx).alias(x),
+            (y0 + pl.col("_cy") * sy).alias(y),
+            "count",
+        )
+        .sort(x, y)
+        .collect()
+    )
+
+
+def top_k(
+    df: pl.DataFrame,
+    column: str,
+    k: int = 20,
+    value: str | None = None,
+    other: str | None = "Other",
+) -> pl.DataFrame:
+    """The k largest categories by row count (or sum of value), plus the rest.
+
+    Returns {column} and count (or {value}); the remaining categories are
+    folded into one row labelled other, unless other is None.
+    """
+    metric = pl.col(value).sum() if value else pl.len()
+    name = value or "count"
+    totals = df.group_by(column).agg(metric.alias(name)).sort(name, descending=True)
+    head, rest = totals.head(k), totals.slice(k)
+    if other is None or rest.is_empty():
+        return head
+    tail = pl.DataFrame({column: [other], name: [rest[name].sum()]}).cast(head.schema)
+    return pl.concat([head, tail])
+
+
+def _bound(value: Any, dtype: pl.DataType) -> Any:
+    """value as a scalar of dtype.
+
+    Selections from a pandas-backed chart come back as Timestamps or numpy
+    scalars; pl.Series([np.datetime64(...)]) would be an Object column.
+    """
+    if hasattr(value, "to_pydatetime"):
+        value = value.to_pydatetime()
+    values = np.array([value]) if isinstance(value, np.generic) else [value]
+    return pl.Series(values).cast(dtype)[0]
+
+
+def window(df: pl.DataFrame, x: str, domain: tuple[Any, Any] | None) -> pl.DataFrame:
+    """Rows with x inside domain (inclusive), by binary search.
+
+    df must already be sorted by x; domain None returns df unchanged.
+    """
+    if domain is None:
+        return df
+    s = df[x]
+    lo, hi = (None if v is None else _bound(v, s.dtype) for v in domain)
+    start = 0 if lo is None else int(s.search_sorted(lo, side="left"))
+    end = df.height if hi is None else int(s.search_sorted(hi, side="right"))
+    return df.slice(start, max(0, end - start))
+
+
+def domain_from(selection: Any, x: str) -> tuple[Any, Any] | None:
+    """(min, max) of x over a chart selection, or None if nothing is selected.
+
+    Accepts the .value of mo.ui.altair_chart / mo.ui.plotly (Polars or
+    pandas). An empty selection means "no zoom", not "no rows".
+    """
+    if selection is None or len(selection) == 0:
+        return None
+    col = selection[x]
+    return col.min(), col.max()
+
+
+# -- benchmark ---------------------------------------------------------------
+
+def benchmark(rows: int, points: int) -> None:
+    rng = np.random.default_rng(0)
+    start = np.datetime64("2020-01-01T00:00:00.000")
+    df = pl.DataFrame({
+        "time": pl.Series(start + np.arange(rows).astype("timedelta64[s]").astype("timedelta64[ms]")),
+        "value": np.cumsum(rng.normal(0, 1, rows)),
+        "x": rng.normal(0, 1, rows),
+        "y": rng.normal(0, 1, rows),
+        "category": pl.Series(rng.zipf(1.5, rows) % 500).cast(pl.String),
+    })
+    print(f"{rows:,} rows in, budget {points:,} points\n")
+
+    def timed(label: str, fn) -> pl.DataFrame:
+        t0 = time.perf_counter()
+        out = fn()
+        print(f"  {label:<28} {out.height:>8,} rows  {(time.perf_counter() - t0) * 1000:8.1f} ms")
+        return out
+
+    line = timed("lttb (line)", lambda: lttb(df, "time", "value", points))
+    lo, hi = df["time"][rows // 3], df["time"][rows // 3 + rows // 100]
+    timed("window 1% + lttb (zoom)", lambda: lttb(window(df, "time", (lo, hi)), "time", "value", points))
+    # Chart selections arrive as numpy/pandas scalars; they must select the same rows
+    as_numpy = (np.datetime64(lo, "ns"), np.datetime64(hi, "ns"))
+    assert window(df, "time", as_numpy).equals(window(df, "time", (lo, hi))), "numpy bounds differ"
+    timed("bin_xy 200x200 (scatter)", lambda: bin_xy(df, "x", "y", 200))
+    timed("hexbin gridsize 80", lambda: hexbin(df, "x", "y", 80))
+    timed("top_k 20 (bars)", lambda: top_k(df, "category", 20))
+
+    # What a chart spec embeds: every row as JSON
+    raw = len(df.select("time", "value").write_json())
+    reduced = len(line.select("time", "value").write_json())
+    print(f"\n  line payload: {raw / 1e6:,.1f} MB raw -> {reduced / 1e3:,.1f} KB downsampled")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chart downsampling helpers.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows in the sample frame")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="Point budget for lttb")
+    args = parser.parse_args()
+    benchmark(args.rows, args.points)
+
+
+if __name__ == "__main__":
+    main()
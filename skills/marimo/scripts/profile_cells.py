@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Profile a marimo notebook headless, cell by cell.
+
+Usage:
+    python profile_cells.py notebook.py
+    python profile_cells.py notebook.py -o profile.json
+    python profile_cells.py notebook.py --compare previous.json
+    python profile_cells.py notebook.py --min-seconds 0.5 --no-tracemalloc
+
+Runs every cell once in dependency order (like `python notebook.py`, but
+without going through app.run()) and records per cell:
+    - wall time
+    - peak Python memory above the pre-cell baseline (tracemalloc)
+    - growth of the process's peak RSS (catches native allocations)
+    - size of each defined variable and of the cell's display output
+
+Numbers are joined to the cell graph from cell_graph.py, and cells that
+are slow enough to be worth caching are flagged:
+    - mo.persistent_cache: slow cells that depend only on imports
+      (loading or downloading data, same result every session)
+    - mo.cache: slow cells downstream of other cells, which re-run
+      whenever anything upstream changes
+
+A failing cell is recorded with its error and its descendants are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import asyncio
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from cell_graph import analyze_notebook, downstream  # noqa: E402
+
+OUTPUT_NAME = "__cell_output__"
+
+
+def object_size(obj: Any) -> int:
+    """Best-effort in-memory size of obj in bytes."""
+    try:
+        if hasattr(obj, "estimated_size"):          # polars
+            return int(obj.estimated_size())
+        if hasattr(obj, "memory_usage"):            # pandas
+            usage = obj.memory_usage(deep=True)
+            return int(usage.sum() if hasattr(usage, "sum") else usage)
+        if hasattr(obj, "nbytes"):                  # numpy, pyarrow
+            return int(obj.nbytes)
+    except Exception:
+        pass
+    return sys.getsizeof(obj)
+
+
+def peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss if platform.system() == "Darwin" else rss * 1024
+
+
+def topological_order(cells: list[dict[str, Any]]) -> list[int]:
+    """Cells ordered so parents run first; ties keep file order."""
+    remaining = {i: set(c["parents"]) for i, c in enumerate(cells)}
+    order: list[int] = []
+    while remaining:
+        ready = sorted(i for i, parents in remaining.items() if not parents)
+        if not ready:
+            # Cycle: fall back to file order for whatever is left
+            ready = sorted(remaining)
+        for i in ready:
+            order.append(i)
+            del remaining[i]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+    return order
+
+
+def compile_cell(node: ast.AST, kind: str, filename: str):
+    """Compile one cell so running it returns (locals, display output).
+
+    A trailing expression (what marimo would display) is captured into
+    OUTPUT_NAME and the cell's own return is replaced by `return locals()`.
+    """
+    node.decorator_list = []
+    if kind == "setup":
+        module = ast.Module(body=node.body, type_ignores=[])
+    elif kind == "cell":
+        body = list(node.body)
+        if body and isinstance(body[-1], ast.Return):
+            body.pop()
+        if body and isinstance(body[-1], ast.Expr):
+            expr = body.pop()
+            body.append(ast.Assign(
+                targets=[ast.Name(id=OUTPUT_NAME, ctx=ast.Store())],
+                value=expr.value,
+            ))
+        body.append(ast.Return(value=ast.Call(
+            func=ast.Name(id="locals", ctx=ast.Load()), args=[], keywords=[],
+        )))
+        node.body = body
+        module = ast.Module(body=[node], type_ignores=[])
+    else:
+        module = ast.Module(body=[node], type_ignores=[])
+    ast.fix_missing_locations(module)
+    return compile(module, filename, "exec")
+
+
+def cell_nodes(tree: ast.Module) -> list[tuple[ast.AST, str]]:
+    """Cell AST nodes in the same order analyze_notebook reports them."""
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.With) and any(
+            isinstance(item.context_expr, ast.Attribute)
+            and item.context_expr.attr == "setup"
+            for item in node.items
+        ):
+            nodes.append((node, "setup"))
+            continue
+        for decorator in getattr(node, "decorator_list", []):
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            if isinstance(target, ast.Attribute) and target.attr in ("cell", "function", "class_definition"):
+                nodes.append((node, target.attr))
+                break
+    return nodes
+
+
+def run_cell(code, node: ast.AST, kind: str, namespace: dict) -> tuple[dict, Any]:
+    """Execute a compiled cell; return (new bindings, display output)."""
+    if kind != "cell":
+        before = set(namespace)
+        exec(code, namespace)
+        return {k: namespace[k] for k in set(namespace) - before}, None
+
+    scratch: dict[str, Any] = {}
+    exec(code, namespace, scratch)
+    func = scratch[node.name]
+    kwargs = {arg.arg: namespace[arg.arg] for arg in node.args.args if arg.arg in namespace}
+    result = func(**kwargs)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    output = result.pop(OUTPUT_NAME, None)
+    return result, output
+
+
+def profile_notebook(
+    path: Path,
+    use_tracemalloc: bool = True,
+    min_seconds: float = 1.0,
+    min_share: float = 0.2,
+) -> dict[str, Any]:
+    """Run the notebook once and return the profile as a JSON-able dict."""
+    source = path.read_text()
+    cells = analyze_notebook(source)
+    nodes = cell_nodes(ast.parse(source))
+    namespace: dict[str, Any] = {"__name__": "__marimo_profile__", "__file__": str(path)}
+    failed: set[int] = set()
+    records: list[dict[str, Any] | None] = [None] * len(cells)
+
+    if use_tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    for i in topological_order(cells):
+        cell = cells[i]
+        node, kind = nodes[i]
+        record = {
+            "index": i,
+            "name": cell["name"],
+            "kind": kind,
+            "lineno": cell["lineno"],
+            "defs": cell["defs"],
+            "refs": cell["refs"],
+            "parents": cell["parents"],
+            "downstream": len(downstream(cells, i)),
+            "status": "ok",
+            "seconds": None,
+            "peak_bytes": None,
+            "rss_growth_bytes": None,
+            "output_bytes": None,
+            "def_bytes": {},
+            "error": None,
+            # Cells whose inputs are only modules give the same result every
+            # session, so their results can be persisted to disk. A cell with
+            # no inputs at all is usually the import cell, not a candidate
+            "imports_only": bool(cell["refs"]) and all(
+                isinstance(namespace.get(ref), types.ModuleType) for ref in cell["refs"]
+            ),
+            "defines_modules": False,
+        }
+        records[i] = record
+
+        if failed.intersection(cell["parents"]):
+            record["status"] = "skipped"
+            failed.add(i)
+            continue
+
+        code = compile_cell(node, kind, str(path))
+        rss_before = peak_rss_bytes()
+        if use_tracemalloc:
+            tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            bindings, output = run_cell(code, node, kind, namespace)
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            record["seconds"] = time.perf_counter() - t0
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            failed.add(i)
+            continue
+        record["seconds"] = time.perf_counter() - t0
+        if use_tracemalloc:
+            record["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - mem_before)
+        record["rss_growth_bytes"] = peak_rss_bytes() - rss_before
+
+        public = {k: v for k, v in bindings.items() if not k.startswith("_")}
+        namespace.update(public)
+        record["def_bytes"] = {k: object_size(v) for k, v in public.items() if k in cell["defs"]}
+        # Import cells: modules can't be cached or persisted, so no advice
+        record["defines_modules"] = bool(cell["defs"]) and all(
+            isinstance(namespace.get(name), types.ModuleType) for name in cell["defs"]
+        )
+        if output is not None:
+            record["output_bytes"] = object_size(output)
+
+    total = time.perf_counter() - started
+    if use_tracemalloc:
+        tracemalloc.stop()
+
+    for record in records:
+        record["flag"] = suggestion(record, total, min_seconds, min_share)
+
+    return {
+        "notebook": str(path),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "tracemalloc": use_tracemalloc,
+        "total_seconds": total,
+        "cells": records,
+    }
+
+
+def suggestion(record: dict, total: float, min_seconds: float, min_share: float) -> str | None:
+    """Name the caching primitive worth trying for a slow cell, if any."""
+    seconds = record["seconds"]
+    if record["status"] != "ok" or not seconds or not record["defs"]:
+        return None
+    if record.get("defines_modules"):
+        return None
+    if seconds < min_seconds and (not total or seconds / total < min_share):
+        return None
+    if record["imports_only"]:
+        return "mo.persistent_cache"
+    return "mo.cache"
+
+
+def format_bytes(n: int | None) -> str:
+    if n is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def print_profile(profile: dict, previous: dict | None = None) -> None:
+    prev_times = {}
+    if previous:
+        # Match cells across runs by what they define, falling back to position
+        for c in previous["cells"]:
+            prev_times[tuple(c["defs"]) or ("#", c["index"])] = c["seconds"]
+
+    print(f"Profile of {profile['notebook']} ({profile['total_seconds']:.2f}s total)\n")
+    header = f"{'cell':>4} {'line':>5} {'status':<8} {'time':>9} {'peak mem':>10} {'outputs':>10}"
+    if previous:
+        header += f" {'vs prev':>9}"
+    print(header + "  defs")
+    print("-" * (len(header) + 20))
+    for c in profile["cells"]:
+        seconds = f"{c['seconds']:.3f}s" if c["seconds"] is not None else "-"
+        out_total = sum(c["def_bytes"].values()) + (c["output_bytes"] or 0)
+        line = (
+            f"{c['index']:>4} {c['lineno']:>5} {c['status']:<8} {seconds:>9} "
+            f"{format_bytes(c['peak_bytes']):>10} {format_bytes(out_total if c['status'] == 'ok' else None):>10}"
+        )
+        if previous:
+            before = prev_times.get(tuple(c["defs"]) or ("#", c["index"]))
+            if before and c["seconds"] is not None:
+                line += f" {(c['seconds'] - before) / before * 100:>+8.0f}%"
+            else:
+                line += f" {'-':>9}"
+        print(f"{line}  {', '.join(c['defs']) or '-'}")
+        if c["error"]:
+            print(f"{'':>11}{c['error'][:100]}")
+
+    flagged = [c for c in profile["cells"] if c["flag"]]
+    if flagged:
+        print("\nWorth caching:")
+        for c in sorted(flagged, key=lambda c: -c["seconds"]):
+            print(
+                f"  cell {c['index']} (line {c['lineno']}, {c['seconds']:.2f}s, "
+                f"{c['downstream']} downstream): wrap in {c['flag']}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless per-cell profiler for marimo notebooks."
+    )
+    parser.add_argument("notebook", type=Path, help="marimo notebook (.py)")
+    parser.add_argument("--output", "-o", type=Path, help="Write the profile as JSON")
+    parser.add_argument("--compare", type=Path, help="Previous profile JSON to compare against")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON")
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="Flag cells at least this slow (default: 1.0)",
+    )
+    parser.add_argument(
+        "--min-share",
+        type=float,
+        default=0.2,
+        help="...or taking at least this share of total runtime (default: 0.2)",
+    )
+    parser.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        help="Skip Python allocation tracking (lower overhead, RSS only)",
+    )
+    args = parser.parse_args()
+
+    if not args.notebook.exists():
+        print(f"Error: File not found: {args.notebook}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        profile = profile_notebook(
+            args.notebook.resolve(),
+            use_tracemalloc=not args.no_tracemalloc,
+            min_seconds=args.min_seconds,
+            min_share=args.min_share,
+        )
+    except SyntaxError as e:
+        print(f"Syntax error in notebook: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        args.output.write_text(json.dumps(profile, indent=2) + "\n")
+
+    if args.json:
+        print(json.dumps(profile, indent=2))
+    else:
+        previous = json.loads(args.compare.read_text()) if args.compare else None
+        print_profile(profile, previous)
+
+    if any(c["status"] == "error" for c in profile["cells"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Run a marimo notebook as a script over a grid of parameters, in parallel.
+
+Usage:
+    python sweep.py notebook.py -p data=a.csv,b.csv,c.csv -p threshold=25,50
+    python sweep.py notebook.py --grid grid.json --jobs 8 --out sweeps/run1
+    python sweep.py notebook.py --grid grid.json --input data/   # hash inputs into the key
+    python sweep.py notebook.py --grid grid.json --force         # ignore cached runs
+
+Each combination runs as `python notebook.py --key value ...` in its own
+process, up to --jobs at a time. Inside the notebook, read parameters with
+mo.cli_args() and write results to the per-run output directory:
+
+    @app.cell
+    def _(mo):
+        args = mo.cli_args()
+        data_path = args.get("data", "data.csv")
+        threshold = float(args.get("threshold", 50))
+        return data_path, threshold
+
+    @app.cell
+    def _(summary):
+        import os
+        out = os.environ.get("MARIMO_SWEEP_OUTPUT_DIR")
+        if out:
+            summary.write_csv(f"{out}/summary.csv")
+
+The same values are also available as JSON in MARIMO_SWEEP_PARAMS.
+
+Runs are cached by a hash of the notebook source, the parameters, and the
+content of any input files (--input paths, plus parameter values that are
+existing files). A rerun skips every combination that already succeeded.
+
+After all runs finish, every *.csv and *.json (object or list of objects)
+in each run directory is gathered into <out>/results.csv and
+<out>/results.jsonl. Leading columns are run_id, the parameters and output
+(the file a row came from); the notebook's own columns are prefixed with
+"out_", so an output named like a parameter can't overwrite it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+MARKER = "run.json"
+
+# Prefix for notebook output columns in the gathered table
+OUTPUT_PREFIX = "out_"
+
+
+def parse_param(spec: str) -> tuple[str, list[str]]:
+    """Parse key=v1,v2,v3 into (key, [values])."""
+    key, sep, values = spec.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=v1,v2,...: {spec!r}")
+    return key, values.split(",")
+
+
+def build_grid(grid: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """Cartesian product of parameter lists, in stable key order."""
+    keys = list(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def hash_path(path: Path, digest: "hashlib._Hash") -> None:
+    """Feed a file, or every file under a directory, into digest."""
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path.parent)).encode())
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+
+def run_key(
+    notebook_sha: str,
+    params: dict[str, Any],
+    file_shas: dict[str, str],
+    inputs_sha: str | None,
+) -> str:
+    """Cache key: notebook code + parameters + content of referenced inputs."""
+    payload = {
+        "notebook": notebook_sha,
+        "params": params,
+        "files": {str(v): file_shas[str(v)] for v in params.values() if str(v) in file_shas},
+        "inputs": inputs_sha,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def run_one(
+    notebook: Path,
+    params: dict[str, Any],
+    run_dir: Path,
+    timeout: float | None,
+) -> dict[str, Any]:
+    """Execute one parameter combination; write and return its marker."""
+    run_dir.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable, str(notebook)]
+    for key, value in params.items():
+        cmd += [f"--{key}", str(value)]
+    env = dict(
+        os.environ,
+        MARIMO_SWEEP_OUTPUT_DIR=str(run_dir),
+        MARIMO_SWEEP_PARAMS=json.dumps(params, default=str),
+    )
+
+    start = time.perf_counter()
+    status, returncode = "ok", None
+    with open(run_dir / "stdout.log", "w") as out, open(run_dir / "stderr.log", "w") as err:
+        try:
+            proc = subprocess.run(
+                cmd, stdout=out, stderr=err, env=env, cwd=notebook.parent, timeout=timeout
+            )
+            returncode = proc.returncode
+            if returncode != 0:
+                status = "failed"
+        except subprocess.TimeoutExpired:
+            status = "timeout"
+
+    marker = {
+        "params": params,
+        "status": status,
+        "returncode": returncode,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    (run_dir / MARKER).write_text(json.dumps(marker, indent=2, default=str) + "\n")
+    return marker
+
+
+def read_rows(run_dir: Path) -> list[tuple[str, dict[str, Any]]]:
+    """(output file name, row) for every row of every CSV and JSON output a run produced."""
+    rows: list[tuple[str, dict[str, Any]]] = []
+    for path in sorted(run_dir.iterdir()):
+        if path.name == MARKER:
+            continue
+        if path.suffix == ".csv":
+            with open(path, newline="") as f:
+                rows.extend((path.name, row) for row in csv.DictReader(f))
+        elif path.suffix == ".json":
+            try:
+                data = json.loads(path.read_text())
+            except json.JSONDecodeError:
+                continue
+            records = data if isinstance(data, list) else [data]
+            rows.extend((path.name, r) for r in records if isinstance(r, dict))
+    return rows
+
+
+def gather(runs: list[tuple[str, dict[str, Any], Path]], out_dir: Path) -> int:
+    """Combine per-run outputs into results.csv and results.jsonl."""
+    rows = []
+    for run_id, params, run_dir in runs:
+        for output, row in read_rows(run_dir):
+            rows.append({
+                "run_id": run_id,
+                **params,
+                "output": output,
+                **{f"{OUTPUT_PREFIX}{key}": value for key, value in row.items()},
+            })
+    if not rows:
+        return 0
+
+    columns: dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    with open(out_dir / "results.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(columns))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(out_dir / "results.jsonl", "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parallel parameter sweeps for marimo notebooks run as scripts."
+    )
+    parser.add_argument("notebook", type=Path, help="marimo notebook (.py)")
+    parser.add_argument(
+        "-p", "--param",
+        type=parse_param,
+        action="append",
+        default=[],
+        metavar="KEY=V1,V2",
+        help="Parameter values to sweep (repeatable)",
+    )
+    parser.add_argument(
+        "--grid",
+        type=Path,
+        help='JSON file: {"key": [values, ...], ...}',
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        action="append",
+        default=[],
+        help="Input file or directory whose content is part of every cache key (repeatable)",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=None,
+        help="Output directory (default: __marimo__/sweeps/<notebook stem>)",
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="Parallel runs (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-run timeout in seconds")
+    parser.add_argument("--force", action="store_true", help="Re-run combinations that already succeeded")
+    args = parser.parse_args()
+
+    notebook = args.notebook.resolve()
+    if not notebook.exists():
+        print(f"Error: File not found: {args.notebook}", file=sys.stderr)
+        sys.exit(1)
+
+    grid: dict[str, list[Any]] = {}
+    if args.grid:
+        grid.update(json.loads(args.grid.read_text()))
+    for key, values in args.param:
+        grid[key] = values
+    if not grid:
+        print("Error: no parameters; use -p key=v1,v2 or --grid", file=sys.stderr)
+        sys.exit(1)
+    reserved = {"run_id", "output"} & set(grid)
+    if reserved:
+        print(f"Error: {', '.join(sorted(reserved))} is reserved for the results table; "
+              "rename that parameter", file=sys.stderr)
+        sys.exit(1)
+    combos = build_grid(grid)
+
+    out_dir = (args.out or notebook.parent / "__marimo__" / "sweeps" / notebook.stem).resolve()
+    (out_dir / "runs").mkdir(parents=True, exist_ok=True)
+
+    notebook_sha = hashlib.sha256(notebook.read_bytes()).hexdigest()
+    inputs_sha = None
+    if args.input:
+        digest = hashlib.sha256()
+        for path in args.input:
+            hash_path(path.resolve(), digest)
+        inputs_sha = digest.hexdigest()
+    # Parameter values that name files are inputs too (hashed once each)
+    file_shas: dict[str, str] = {}
+    for value in {str(v) for combo in combos for v in combo.values()}:
+        candidate = notebook.parent / value
+        if len(value) < 4096 and candidate.is_file():
+            digest = hashlib.sha256()
+            hash_path(candidate.resolve(), digest)
+            file_shas[value] = digest.hexdigest()
+
+    runs = []
+    pending = []
+    for params in combos:
+        run_id = run_key(notebook_sha, params, file_shas, inputs_sha)[:16]
+        run_dir = out_dir / "runs" / run_id
+        runs.append((run_id, params, run_dir))
+        marker = run_dir / MARKER
+        if not args.force and marker.exists():
+            if json.loads(marker.read_text()).get("status") == "ok":
+                continue
+        pending.append((run_id, params, run_dir))
+
+    cached = len(runs) - len(pending)
+    print(f"{len(runs)} combination(s): {cached} cached, {len(pending)} to run ({args.jobs} at a time)")
+
+    start = time.perf_counter()
+    failures = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(run_one, notebook, params, run_dir, args.timeout): (run_id, params)
+            for run_id, params, run_dir in pending
+        }
+        for future in as_completed(futures):
+            run_id, params = futures[future]
+            marker = future.result()
+            label = " ".join(f"{k}={v}" for k, v in params.items())
+            print(f"  [{marker['status']:>7}] {run_id}  {marker['seconds']:>7.1f}s  {label}")
+            if marker["status"] != "ok":
+                failures.append(run_id)
+
+    n_rows = gather([r for r in runs if r[0] not in failures], out_dir)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Done in {elapsed:.1f}s: {len(pending) - len(failures)} ran, {cached} cached, "
+        f"{len(failures)} failed"
+    )
+    if n_rows:
+        print(f"Gathered {n_rows} row(s) into {out_dir / 'results.csv'}")
+    for run_id in failures:
+        print(f"  see {out_dir / 'runs' / run_id / 'stderr.log'}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()